@@ -1,5 +1,6 @@
 import os
 import argparse
+import time
 
 import numpy.random as rnd
 from operators import (
@@ -9,36 +10,38 @@ from operators import (
     repair_1,
     repair_2,
     repair_3,
+    repair_4,
 )
 from psp import PSP, Parser
 from src.alns import ALNS
 from src.alns.criteria import *
 from src.helper import save_output
+from src.instance_cache import InstanceSource
+from src.results import ResultsWriter, read_solutions
 from src.settings import DATA_PATH
 
 
-if __name__ == "__main__":
-
-    parser = argparse.ArgumentParser(description='load data')
-    parser.add_argument(dest='data', type=str, help='data')
-    parser.add_argument(dest='seed', type=int, help='seed')
-    args = parser.parse_args()
-    
-    # instance file and random seed
-    json_file = args.data
-    seed = int(args.seed)
-    
-    # load data and random seed
-    parsed = Parser(json_file)
-    psp = PSP(parsed.name, parsed.workers, parsed.tasks, parsed.Alpha)
+def solve(instance, seed, results=None, instance_file=None, warm_start=None, use_lower_bound=False):
+    """Solve a PSP instance with ALNS, and save the initial and final solutions,
+    or only append the final one to results, a ResultsWriter, if given.
+    The search starts from the solution of warm_start, a record of the instance read with
+    src.results.read_solutions, if given, and from a random solution otherwise.
+    With use_lower_bound, the gap to the lower bound of the instance is reported, and the search
+    stops once the best solution reaches the bound"""
+    if warm_start is not None:
+        # continue from the best known solution, checked as it is read from a file
+        psp = PSP.from_assignment(instance, warm_start["assignment"], check=True)
+    else:
+        psp = PSP(instance)
 
-    # construct random initialized solution
-    psp.random_initialize(seed)
+        # construct random initialized solution
+        psp.random_initialize(seed)
 
     print("Initial solution objective is {}.".format(psp.objective()))
 
     # Generate output file
-    save_output("Leonardo_ALNS", psp, "initial")  # // Modify with your name
+    if results is None:
+        save_output("Leonardo_ALNS", psp, "initial")  # // Modify with your name
 
     # ALNS
     random_state = rnd.RandomState(seed)
@@ -57,6 +60,7 @@ if __name__ == "__main__":
     alns.add_repair_operator(repair_1)
     alns.add_repair_operator(repair_2)
     alns.add_repair_operator(repair_3)
+    alns.add_repair_operator(repair_4)
     # -----------------------------------------------------------------
 
     # run ALNS & Select Criterion
@@ -65,14 +69,74 @@ if __name__ == "__main__":
     
     omegas = [10, 4, 2, 1]  # // Select the weights adjustment strategy
     lambda_ = 0.8  # // Select the decay parameter
+    # stop early if the best solution reaches the lower bound, as it is then optimal
+    lower_bound = instance.lower_bound() if use_lower_bound else None
+    iterations = 10000  # Modify number of ALNS iterations as you see fit
+    start = time.perf_counter()
     result = alns.iterate(
-        psp, omegas, lambda_, criterion, iterations=10000, collect_stats=True
-    )  # Modify number of ALNS iterations as you see fit
+        psp, omegas, lambda_, criterion, iterations=iterations, collect_stats=True,
+        lower_bound=lower_bound, gap_tolerance=0 if use_lower_bound else None,
+    )
+    runtime = time.perf_counter() - start
 
     # result
     solution = result.best_state
     objective = solution.objective()
     print("Best heuristic objective is {}.".format(objective))
+    if use_lower_bound:
+        print("Lower bound is {}, gap is {:.2%}.".format(lower_bound, result.gap))
 
     # visualize final solution and generate output file
-    save_output("Leonardo_ALNS", solution, "solution")  # // Modify with your name
+    if results is None:
+        save_output("Leonardo_ALNS", solution, "solution")  # // Modify with your name
+    else:
+        results.add(solution, seed, runtime, instance_file, iterations=iterations, lower_bound=lower_bound)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='load data')
+    parser.add_argument(dest='data', type=str, help='data, an instance file or a directory of instance files')
+    parser.add_argument(dest='seed', type=int, help='seed')
+    parser.add_argument(
+        '--results', type=str, default=None,
+        help='json lines file the solutions are appended to, instead of a text file per solution',
+    )
+    parser.add_argument(
+        '--warm-start', type=str, default=None,
+        help='results file to start from the best solution of the instance in, see --results',
+    )
+    parser.add_argument(
+        '--lower-bound', action='store_true',
+        help='report the gap to a lower bound of each instance, and stop once the best solution reaches it',
+    )
+    args = parser.parse_args()
+    
+    # instance file and random seed
+    json_file = args.data
+    seed = int(args.seed)
+    results = ResultsWriter(args.results) if args.results else None
+    # the best solution of each instance in the warm start file, read once for all instances
+    warm_starts = read_solutions(args.warm_start) if args.warm_start else None
+
+    def warm_start(instance):
+        if warm_starts is None:
+            return None
+        if instance.name not in warm_starts:
+            print("{} has no solution of {}, starting from a random solution.".format(args.warm_start, instance.name))
+        return warm_starts.get(instance.name)
+    
+    try:
+        if os.path.isdir(json_file):
+            # solve each instance of the directory, while the next ones are loaded in the background
+            with InstanceSource.from_directory(json_file, lambda path: Parser(path).instance) as source:
+                for path, instance in source:
+                    print("Solving {}.".format(path))
+                    solve(instance, seed, results, path, warm_start(instance), args.lower_bound)
+        else:
+            # load data and random seed
+            instance = Parser(json_file).instance
+            solve(instance, seed, results, json_file, warm_start(instance), args.lower_bound)
+    finally:
+        if results is not None:
+            results.close()
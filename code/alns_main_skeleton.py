@@ -23,7 +23,7 @@ if __name__ == "__main__":
     
     # load data and random seed
     parsed = Parser(json_file)
-    psp = PSP(parsed.name, parsed.workers, parsed.tasks, parsed.Alpha)
+    psp = PSP(parsed.instance)
 
     # construct random initialized solution
     psp.random_initialize(seed)
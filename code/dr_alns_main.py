@@ -1,5 +1,7 @@
 import argparse
+import time
 from src.helper import save_output
+from src.results import ResultsWriter
 from stable_baselines3 import PPO
 
 from psp_AlnsEnv import pspAlnsEnv
@@ -15,9 +17,18 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='load data')
     parser.add_argument(dest='data', type=str, help='data')
     parser.add_argument(dest='seed', type=lambda s: [int(item) for item in s.split(',')], help='seed')
+    parser.add_argument(
+        '--results', type=str, default=None,
+        help='json lines file the solutions are appended to, instead of a text file per seed',
+    )
+    parser.add_argument(
+        '--warm-start', type=str, default=None,
+        help='results file to start from the best solution of the instance in, see --results',
+    )
     args = parser.parse_args()
     
     json_file = args.data
+    results = ResultsWriter(args.results) if args.results else None
     
     objs = []
     
@@ -33,7 +44,9 @@ if __name__ == "__main__":
             }
         }
         env = pspAlnsEnv(parameters)
-        env.run(model, seed = seed)
+        start = time.perf_counter()
+        env.run(model, seed = seed, warm_start = args.warm_start)
+        runtime = time.perf_counter() - start
 
         # result
         solution = env.best_solution
@@ -42,6 +55,11 @@ if __name__ == "__main__":
         print("Best objective is {}.".format(objective))
 
         # generate output file
-        save_output("<YourName>_DR_ALNS", solution, "solution" + str(seed))
+        if results is None:
+            save_output("<YourName>_DR_ALNS", solution, "solution" + str(seed))
+        else:
+            results.add(solution, seed, runtime, env.instance_path, iterations=iterations, model=model_path)
         
+    if results is not None:
+        results.close()
     print(statistics.median(objs))
\ No newline at end of file
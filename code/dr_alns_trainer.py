@@ -9,3 +9,4 @@ if __name__ == "__main__":
     trainer = Trainer(env=pspAlnsEnv, config=config)
     trainer.create_model()
     trainer.train()
+    trainer.close()
@@ -0,0 +1,24 @@
+import argparse
+
+from psp import PSP, Parser
+from src.instance_cache import InstanceCache
+from src.results import export_legacy
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='export a results file to the text output format')
+    parser.add_argument(dest='results', type=str, help='results file, written with --results')
+    parser.add_argument('--name', type=str, default='Leonardo_ALNS', help='name in the output files')
+    parser.add_argument('--suffix', type=str, default='solution', help='suffix of the output files, followed by the seed')
+    parser.add_argument('--compression', type=str, default=None, help='compression of the output files, eg. .gz')
+    args = parser.parse_args()
+
+    # records of the same instance share its parsed data
+    instances = InstanceCache(lambda path: Parser(path).instance)
+    count = export_legacy(
+        args.results,
+        lambda record: PSP.from_assignment(instances.get(record["instance_file"]), record["assignment"]),
+        args.name, args.suffix, args.compression,
+    )
+    print("Exported {} solutions.".format(count))
@@ -0,0 +1,25 @@
+import argparse
+
+from src.instance_generator import TIERS, generate_tier, write_instance
+from src.settings import GENERATED_INSTANCES
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='generate synthetic instances for scaling studies')
+    parser.add_argument(dest='tiers', type=str, nargs='*', default=list(TIERS), help='size tiers, one of {}'.format(list(TIERS)))
+    parser.add_argument('--seeds', type=lambda s: [int(item) for item in s.split(',')], default=[0], help='seeds, eg. 0,1,2')
+    parser.add_argument('--skills', type=int, default=4, help='number of distinct skills')
+    parser.add_argument('--skill-rarity', type=float, default=1.0, help='how unevenly skills are spread over workers, 0 for evenly')
+    parser.add_argument('--availability', type=float, default=0.65, help='probability that a worker is available on a day')
+    parser.add_argument('--output', type=str, default=GENERATED_INSTANCES, help='output directory')
+    parser.add_argument('--compression', type=str, default=None, help='compression of the files, eg. .gz')
+    args = parser.parse_args()
+
+    for tier in args.tiers:
+        for seed in args.seeds:
+            data = generate_tier(
+                tier, seed, num_skills=args.skills, skill_rarity=args.skill_rarity, availability=args.availability,
+            )
+            path = write_instance(data, args.output, args.compression)
+            print("{}: {} workers, {} tasks, {} days.".format(path, len(data["Workers"]), len(data["Tasks"]), data["T"]))
@@ -0,0 +1,131 @@
+import argparse
+import glob
+import json
+import os
+import tempfile
+import timeit
+
+from psp import PSP, Parser
+from src import instance_cache
+from src.file_io import open_file, read_bytes, resolve_compressed, strip_compression
+from src.instance_cache import compile_instance, decode_json, load_compiled_instance
+from src.settings import DATA_PATH
+
+
+def time_per_call(function, repeat):
+    """Return the best time of a call to function in milliseconds, over 5 rounds of repeat calls"""
+    return min(timeit.repeat(function, number=repeat, repeat=5)) / repeat * 1000
+
+
+class LegacyParser(object):
+    def __init__(self, json_file):
+        """The Parser from before the compiled instances, kept as the baseline: json.load, then a
+        worker and a task object per entry of the nested dicts, converting the available days
+        from strings for each worker. Compressed files are read through src.file_io
+        """
+        self.json_file = json_file
+        with open_file(json_file, "rt") as f:
+            self.data = json.load(f)
+
+        self.name = self.data["name"]
+        self.Alpha = self.data["ALPHA"]
+        self.T = self.data["T"]
+        self.BMAX = self.data["BMax"]
+        self.WMAX = self.data["WMax"]
+        self.RMIN = self.data["RMin"]
+
+        self.workers = [
+            LegacyWorker(worker_data, self.T, self.BMAX, self.WMAX, self.RMIN)
+            for worker_data in self.data["Workers"]
+        ]
+        self.tasks = [LegacyTask(task_data) for task_data in self.data["Tasks"]]
+
+
+class LegacyWorker(object):
+    def __init__(self, data, T, bmax, wmax, rmin):
+        # the attributes the legacy Worker set when parsed
+        self.id = data["w_id"]
+        self.skills = data["skills"]
+        self.T = T
+        self.available = {int(k): v for k, v in data["available"].items()}
+        self.bmin = 4
+        self.bmax = bmax
+        self.wmax = wmax
+        self.rmin = rmin
+
+        self.rate = data["rate"]
+        self.tasks_assigned = []
+        self.blocks = {}
+        self.total_hours = 0
+
+
+class LegacyTask(object):
+    def __init__(self, data):
+        self.id = data["t_id"]
+        self.skill = data["skill"]
+        self.day = data["day"]
+        self.hour = data["hour"]
+
+
+def benchmark(json_file, repeat):
+    """Time the loading steps of an instance file: the legacy Parser as the baseline, then the
+    Parser through the compiled arrays with the json module, with the fast decoder and from the
+    cache. Unlike the legacy Parser, the Parser also builds the presolved PSPInstance"""
+    json_file = resolve_compressed(json_file)
+    content = read_bytes(json_file)
+    fast_decoder = instance_cache.orjson
+
+    timings = {}
+    timings["baseline, legacy Parser"] = time_per_call(lambda: LegacyParser(json_file), repeat)
+    try:
+        # the json module, as without orjson installed
+        instance_cache.orjson = None
+        timings["decode json"] = time_per_call(lambda: json.loads(content), repeat)
+        timings["Parser, json, no cache"] = time_per_call(lambda: Parser(json_file, cache_dir=None), repeat)
+    finally:
+        instance_cache.orjson = fast_decoder
+
+    if fast_decoder is not None:
+        timings["decode orjson"] = time_per_call(lambda: fast_decoder.loads(content), repeat)
+        timings["Parser, orjson, no cache"] = time_per_call(lambda: Parser(json_file, cache_dir=None), repeat)
+
+    data = decode_json(content)
+    timings["compile (validate + arrays + presolve)"] = time_per_call(lambda: compile_instance(data), repeat)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        load_compiled_instance(json_file, cache_dir)
+        timings["load compiled, cached"] = time_per_call(lambda: load_compiled_instance(json_file, cache_dir), repeat)
+        timings["Parser, cached"] = time_per_call(lambda: Parser(json_file, cache_dir=cache_dir), repeat)
+        instance = Parser(json_file, cache_dir=cache_dir).instance
+    timings["PSP from the parsed instance"] = time_per_call(lambda: PSP(instance), repeat)
+    return timings
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="benchmark the loading of instance files")
+    parser.add_argument(
+        dest="data", type=str, nargs="?", default=os.path.join(DATA_PATH, "sample_instances"),
+        help="an instance file or a directory of instance files",
+    )
+    parser.add_argument("--repeat", type=int, default=50, help="calls per timing round")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.data):
+        json_files = sorted(
+            path for path in glob.glob(os.path.join(args.data, "*")) if strip_compression(path).endswith(".json")
+        )
+    else:
+        json_files = [args.data]
+
+    print("orjson is {}installed.".format("" if instance_cache.orjson is not None else "not "))
+    for json_file in json_files:
+        print(os.path.basename(json_file))
+        timings = benchmark(json_file, args.repeat)
+        for step, milliseconds in timings.items():
+            print("  {:<40}{:8.3f} ms".format(step, milliseconds))
+        # speedups of the Parser over the legacy Parser, < 1 when the Parser is slower
+        baseline = timings["baseline, legacy Parser"]
+        for step in ("Parser, json, no cache", "Parser, orjson, no cache", "Parser, cached"):
+            if step in timings:
+                print("  {:<40}{:8.2f} x".format("speedup, " + step, baseline / timings[step]))
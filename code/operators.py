@@ -1,4 +1,3 @@
-import copy
 import random
 
 import numpy as np
@@ -8,131 +7,163 @@ from psp import PSP
 ### Destroy operators ###
 def destroy_1(current: PSP, random_state):
     """Random Tasks Removal"""
-    post_destroy = current.copy()
+    post_destroy = current.working_copy()
     num_tasks_to_remove = random_state.randint(1, 6)
-    assigned_tasks = [task for task in post_destroy.tasks if task not in post_destroy.unassigned]
+    assigned_tasks = [task for task in post_destroy.tasks if post_destroy.assignment[task.id] >= 0]
     tasks_to_remove = random_state.choice(assigned_tasks, num_tasks_to_remove)
     for task in tasks_to_remove:
-        # find the workers who worked on the task
-        for worker in post_destroy.workers:
-            if task in worker.tasks_assigned:
-                worker.remove_task(task.id)
-                post_destroy.unassigned.append(task)
-                break
+        # find the worker who worked on the task, if not removed already
+        worker = post_destroy.worker_of(task)
+        if worker is not None:
+            post_destroy.remove_task(worker, task.id)
     return post_destroy
 
 
 def destroy_2(current: PSP, random_state):
     """Overworked Workers' Tasks Removal"""
-    post_destroy = current.copy()
-    post_destroy.workers.sort(key=lambda worker: worker.total_hours, reverse=True)
+    post_destroy = current.working_copy()
+    workers = sorted(post_destroy.workers, key=lambda worker: worker.total_hours, reverse=True)
     num_workers_to_free = random_state.randint(1, 6)
     num_tasks_to_free = random_state.randint(1, 6)
 
     for _ in range(num_workers_to_free):
-        for worker in post_destroy.workers:
-            while (worker.tasks_assigned) and (num_tasks_to_free > 0):
-                task = worker.tasks_assigned[0]
-                worker.remove_task(task.id)
-                post_destroy.unassigned.append(task)
+        for worker in workers:
+            if num_tasks_to_free == 0:
+                break
+            # tasks_assigned is derived from the assignment, so fetch it once per worker
+            tasks = worker.tasks_assigned
+            while (tasks) and (num_tasks_to_free > 0):
+                task = tasks.pop(0)
+                post_destroy.remove_task(worker, task.id)
                 num_tasks_to_free -= 1
     return post_destroy
 
 
 def destroy_3(current: PSP, random_state):
     """Most Expensive rate Worker's Tasks Removal"""
-    post_destroy = current.copy()
+    post_destroy = current.working_copy()
     num_tasks_to_remove = random_state.randint(1, 6)
     task_costs = []
-    for worker in post_destroy.workers:
-        for task in worker.tasks_assigned:
-            task_costs.append((task, worker.rate))
+    for task in post_destroy.tasks:
+        worker = post_destroy.worker_of(task)
+        if worker is not None:
+            task_costs.append((task, worker))
 
-    task_costs.sort(key=lambda x: x[1], reverse=True)
+    task_costs.sort(key=lambda x: x[1].rate, reverse=True)
     # remove the first num_tasks_to_remove of the most expensive
-    tasks_to_remove = [task for task, _ in task_costs[:num_tasks_to_remove]]
-    for task in tasks_to_remove:
-        for worker in post_destroy.workers:
-            if task in worker.tasks_assigned:
-                worker.remove_task(task.id)
-                post_destroy.unassigned.append(task)
-                break
+    for task, worker in task_costs[:num_tasks_to_remove]:
+        post_destroy.remove_task(worker, task.id)
     return post_destroy
 
 
 ### Repair operators ###
 def repair_1(destroyed: PSP, random_state):
     """Cheapest Task Assignment. Try to assign as many as possible"""
-    post_repair = destroyed.copy()
-    post_repair.workers.sort(key=lambda worker: worker.rate)
-    prev_len = np.inf
-    current_len = len(post_repair.unassigned)
-    while prev_len > current_len:
-        for task in post_repair.unassigned:
-            for worker in post_repair.workers:
-                if worker.can_assign(task):
-                    worker.assign_task(task)
-                    post_repair.unassigned.remove(task)
-                    break
-
-        prev_len = current_len
-        current_len = len(post_repair.unassigned)
-        # iteration will stop once the list of unassigned tasks don't change
+    post_repair = destroyed.working_copy()
+    # assigning a task can make another one assignable, when the extended block brings it within
+    # rmin, so the unassigned groups are visited again until a pass assigns nothing
+    assigned = True
+    while assigned:
+        assigned = False
+        for tasks in post_repair.unassigned_groups():
+            # the tasks of a group are interchangeable, so they go to the cheapest workers that can
+            # take them, which are ordered by rate
+            for task, worker in zip(tasks, post_repair.free_workers(tasks[0])):
+                post_repair.assign_task(worker, task)
+                assigned = True
+
     return post_repair
 
 
 def repair_2(destroyed: PSP, random_state):
     """Freeest Worker Task Assignment. Try to assign as many as possible"""
-    post_repair = destroyed.copy()
-    post_repair.workers.sort(key=lambda worker: worker.total_hours)
-    prev_len = np.inf
-    current_len = len(post_repair.unassigned)
-    while prev_len > current_len:
-        for task in post_repair.unassigned:
-            for worker in post_repair.workers:
-                if worker.can_assign(task):
-                    worker.assign_task(task)
-                    post_repair.unassigned.remove(task)
-                    break
-
-        prev_len = current_len
-        current_len = len(post_repair.unassigned)
-        # iteration will stop once the list of unassigned tasks don't change
+    post_repair = destroyed.working_copy()
+    workers = post_repair.workers
+    # rank of each worker by the hours worked before the repair
+    rank = {
+        w: r for r, w in enumerate(sorted(range(len(workers)), key=lambda w: workers[w].total_hours))
+    }
+    # repeated until a pass assigns nothing, see repair_1
+    assigned = True
+    while assigned:
+        assigned = False
+        for tasks in post_repair.unassigned_groups():
+            workers = sorted(post_repair.free_workers(tasks[0]), key=lambda worker: rank[worker.index])
+            for task, worker in zip(tasks, workers):
+                post_repair.assign_task(worker, task)
+                assigned = True
+
     return post_repair
 
 def repair_3(destroyed: PSP, random_state):
     """Most Cost-Effective Task Assignment"""
-    post_repair = destroyed.copy()
-    prev_len = np.inf
-    current_len = len(post_repair.unassigned)
-    while prev_len > current_len:
-        for task in post_repair.unassigned:
-            current_minimum_cost_difference = np.inf
-            current_minimum_to_assign_to = None
-            for worker in post_repair.workers:
-                if worker.can_assign(task):
-                    # make a simulated worker that if assigned, count the objective function
-                    current_objective = worker.get_objective()
-                    current_cost = max(current_objective, 50) if current_objective > 0 else 0
-
-                    simulated_worker = copy.deepcopy(worker)
-                    simulated_worker.assign_task(task)
-
-                    simulated_objective = worker.get_objective()
-                    simulated_cost = max(simulated_objective, 50) if simulated_objective > 0 else 0
-
-                    cost_difference = simulated_cost - current_cost
-
-                    if cost_difference < current_minimum_cost_difference:
-                        current_minimum_to_assign_to = worker
-                        current_minimum_cost_difference = cost_difference
-            
-            # if the best personnel is found, assign
-            if current_minimum_to_assign_to is not None:
-                current_minimum_to_assign_to.assign_task(task)
-                post_repair.unassigned.remove(task)
-
-        prev_len = current_len
-        current_len = len(post_repair.unassigned)
-        # iteration will stop once the list of unassigned tasks don't change
+    post_repair = destroyed.working_copy()
+    # repeated until a pass assigns nothing, see repair_1
+    assigned = True
+    while assigned:
+        assigned = False
+        for tasks in post_repair.unassigned_groups():
+            cost_differences = []
+            # the cost difference of each class of idle workers, which is the same for all of them, and
+            # how many of them are candidates. A class never supplies more workers than there are tasks,
+            # as the sort keeps its first workers ahead of the others on the same cost
+            idle_cost_differences, idle_counts = {}, {}
+            for worker in post_repair.free_workers(tasks[0]):
+                idle_class = post_repair.idle_class(worker)
+                if idle_class in idle_cost_differences:
+                    if idle_counts[idle_class] < len(tasks):
+                        idle_counts[idle_class] += 1
+                        cost_differences.append((idle_cost_differences[idle_class], worker))
+                    continue
+
+                # count the objective function of the worker as if the task were assigned
+                current_objective = worker.get_objective()
+                current_cost = max(current_objective, 50) if current_objective > 0 else 0
+
+                simulated_objective = worker.get_objective_with(tasks[0])
+                simulated_cost = max(simulated_objective, 50) if simulated_objective > 0 else 0
+
+                cost_differences.append((simulated_cost - current_cost, worker))
+                if idle_class is not None:
+                    idle_cost_differences[idle_class] = simulated_cost - current_cost
+                    idle_counts[idle_class] = 1
+
+            # assign the tasks of the group to the most cost-effective personnel, cheapest rate first on ties.
+            # Assigning a task to a worker does not change the cost difference of the others
+            cost_differences.sort(key=lambda x: x[0])
+            for task, (_, worker) in zip(tasks, cost_differences):
+                post_repair.assign_task(worker, task)
+                assigned = True
+
+    return post_repair
+
+
+def repair_4(destroyed: PSP, random_state):
+    """Batched Cheapest Assignment. Repeatedly assign the pair of task and worker with the lowest cost increase"""
+    post_repair = destroyed.working_copy()
+    tasks = list(post_repair.unassigned)
+    if not tasks:
+        return post_repair
+
+    feasible, cost_increase = post_repair.assignment_costs(tasks)
+    costs = np.where(feasible, cost_increase, np.inf)
+    assigned = np.zeros(len(tasks), dtype=bool)
+    while True:
+        w, j = np.unravel_index(np.argmin(costs), costs.shape)
+        if costs[w, j] == np.inf:
+            # no task can be assigned anymore
+            break
+
+        post_repair.assign_task(post_repair.workers[w], tasks[j])
+        costs[:, j] = np.inf
+        assigned[j] = True
+
+        # only the schedule of worker w changed, so only its row has to be evaluated again, for all
+        # the unassigned tasks: extending its block can bring a task that no worker could take within rmin
+        open_tasks = np.flatnonzero(~assigned)
+        costs[w] = np.inf
+        if len(open_tasks) > 0:
+            row_feasible, row_cost_increase = post_repair.assignment_costs([tasks[k] for k in open_tasks], [w])
+            costs[w, open_tasks] = np.where(row_feasible[0], row_cost_increase[0], np.inf)
+
     return post_repair
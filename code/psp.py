@@ -1,48 +1,97 @@
-import copy
 import json
 import random
+from array import array
+from functools import cached_property
+from itertools import compress
+from operator import attrgetter
 
-from src.alns import State
+import numpy as np
+from src.alns import EncodableState, TransactionalState
+from src.file_io import open_file, resolve_compressed
+from src.instance_cache import load_compiled_instance, presolve_instance
+from src.results import read_solution
+from src.settings import INSTANCE_CACHE
 
 
 ### Parser to parse instance json file ###
-# You should not change this class!
+# The instance is read through the compiled cache of src.instance_cache, see PSPInstance for the
+# data derived from it
 class Parser(object):
-    def __init__(self, json_file):
+    def __init__(self, json_file, cache_dir=INSTANCE_CACHE, compiled=None):
         """initialize the parser, saves the data from the file into the following instance variables:
         -
         Args:
             json_file::str
-                the path to the xml file
+                the path to the json file, which may be compressed, see src.file_io.
+                If it does not exist, its compressed version is used, eg. instance.json.gz
+            cache_dir::str
+                directory of the compiled instance cache, see src.instance_cache,
+                None to always parse the json file
+            compiled::{k: v}
+                the compiled arrays of the file if already loaded, e.g. from a SharedInstancePool
         """
-        self.json_file = json_file
-        with open(json_file, "r") as f:
-            self.data = json.load(f)
-
-        self.name = self.data["name"]
-        self.Alpha = self.data["ALPHA"]
-        self.T = self.data["T"]
-        self.BMAX = self.data["BMax"]
-        self.WMAX = self.data["WMax"]
-        self.RMIN = self.data["RMin"]
-
-        self.workers = [
-            Worker(worker_data, self.T, self.BMAX, self.WMAX, self.RMIN)
-            for worker_data in self.data["Workers"]
-        ]
-        self.tasks = [Task(task_data) for task_data in self.data["Tasks"]]
+        self.json_file = resolve_compressed(json_file)
+        if compiled is None:
+            compiled = load_compiled_instance(self.json_file, cache_dir)
+
+        self.instance = PSPInstance.from_compiled(compiled)
+        self.name = self.instance.name
+        self.Alpha, self.T, self.BMAX, self.WMAX, self.RMIN = compiled["scalars"].tolist()
+        self.workers = self.instance.workers
+        self.tasks = self.instance.tasks
+
+    @property
+    def data(self):
+        """The json data of the instance, read from the file on request"""
+        with open_file(self.json_file, "rt") as f:
+            return json.load(f)
+
+
+class WorkerProfile(object):
+    __slots__ = ("id", "skills", "T", "available", "bmin", "bmax", "wmax", "rmin", "rate")
+
+    def __init__(self, w_id, skills, available, rate, T, bmax, wmax, rmin):
+        """The static data of a worker, which never changes during a run.
+        A profile is shared by reference by the Worker objects of every state of an instance,
+        see Worker for the attributes. available is kept as given, with the days as int keys.
+        """
+        self.id = w_id
+        self.skills = tuple(skills)
+        self.T = T
+        self.available = available
+        # the constant number for f2 in the objective function
+        self.bmin = 4
+        self.bmax = bmax
+        self.wmax = wmax
+        self.rmin = rmin
+
+        self.rate = rate
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _profile_attribute(name):
+    # read-only access to a static attribute of the worker's profile
+    return property(attrgetter("profile." + name))
 
 
 class Worker(object):
-    def __init__(self, data, T, bmax, wmax, rmin):
-        """Initialize the worker
+    __slots__ = ("profile", "index", "_state", "_solution", "_offset")
+
+    def __init__(self, profile, state, index):
+        """A worker of a PSP state. This is a view: the assignment data is stored in the
+        arrays of the state's PSPSolution, and changes go through the state
         Attributes:
             id::int
                 id of the worker
-            skills::[skill]
-                a list of skills of the worker
+            skills::(skill)
+                the skills of the worker
             available::{k: v}
-                key is the day, value is the list of two elements,
+                key is the day, value is a tuple of two elements,
                 the first element in the value is the first available hour for that day,
                 the second element in the value is the last available hour for that day, inclusively
             bmax::int
@@ -53,37 +102,72 @@ class Worker(object):
                 minimum rest time
             rate::int
                 hourly rate
+            profile::WorkerProfile
+                the static attributes above, shared by all states of the instance
+            index::int
+                position of the worker in PSP.workers
             tasks_assigned::[task]
-                a list of task objects
+                a list of task objects, in the order they were assigned
             blocks::{k: v}
                 key is the day where a block is assigned to this worker
                 value is the list of two elements
                 the first element is the hour of the start of the block
-                the second element is the hour of the start of the block
-                if a worker is not assigned any tasks for the day, the key is removed from the blocks dictionary:
-                        Eg. del self.blocks[D]
+                the second element is the hour of the end of the block
+                days without any tasks assigned to the worker are left out
 
             total_hours::int
                 total working hours for the worker
+            block_hours::int
+                total length of all blocks, i.e. the number of hours the worker is paid for
 
         """
-        self.id = data["w_id"]
-        self.skills = data["skills"]
-        self.T = T
-        self.available = {int(k): v for k, v in data["available"].items()}
-        # the constant number for f2 in the objective function
-        self.bmin = 4
-        self.bmax = bmax
-        self.wmax = wmax
-        self.rmin = rmin
+        self.profile = profile
+        self.index = index
+        self._state = state
+        self._solution = state.solution
+        # position of the worker's first day in the (worker x day) arrays of the solution
+        self._offset = index * state.instance.num_days
+
+    id = _profile_attribute("id")
+    skills = _profile_attribute("skills")
+    T = _profile_attribute("T")
+    available = _profile_attribute("available")
+    bmin = _profile_attribute("bmin")
+    bmax = _profile_attribute("bmax")
+    wmax = _profile_attribute("wmax")
+    rmin = _profile_attribute("rmin")
+    rate = _profile_attribute("rate")
 
-        self.rate = data["rate"]
-        self.tasks_assigned = []
-        self.blocks = {}
-        self.total_hours = 0
+    @property
+    def tasks_assigned(self):
+        solution = self._state.solution
+        task_ids = np.flatnonzero(solution.assignment_array() == self.index).tolist()
+        task_ids.sort(key=solution.assigned_order.__getitem__)
+        return [self._state.instance.task_by_id[task_id] for task_id in task_ids]
+
+    @property
+    def blocks(self):
+        solution, offset = self._solution, self._offset
+        return {
+            day: [solution.block_start[offset + day], solution.block_end[offset + day]]
+            for day in range(self._state.instance.num_days)
+            if solution.block_end[offset + day] >= 0
+        }
+
+    @property
+    def total_hours(self):
+        return self._solution.hours[self.index]
+
+    @property
+    def block_hours(self):
+        return self._solution.block_hours[self.index]
 
     def can_assign(self, task):
         # // Implement Code Here
+        return self.is_eligible(task) and self.can_schedule(task)
+
+    def is_eligible(self, task):
+        """Check the static part of can_assign: skill and availability, which never change during a run"""
         ## check skill set
         if task.skill not in self.skills:
             return False
@@ -92,45 +176,51 @@ class Worker(object):
         if task.day not in self.available:
             # if not available that day, False
             return False
-        
+
         if not (self.available[task.day][0] <= task.hour <= self.available[task.day][1]):
             # if available that day, but not that hour, False
             return False
 
+        return True
+
+    def can_schedule(self, task):
+        """Check the dynamic part of can_assign: clashes, rest time, block length and working hours.
+        The task is assumed to pass is_eligible
+        """
+        solution, profile = self._solution, self.profile
+        k = self._offset + task.day
+
         ## cannot do two tasks at the same time
-        for assigned_task in self.tasks_assigned:
-            if assigned_task.day == task.day and assigned_task.hour == task.hour:
-                # if there is a task that has the same day and same hour, False
-                return False
+        if solution.occupancy[k] >> task.hour & 1:
+            # if there is a task that has the same day and same hour, False
+            return False
 
+        block_end = solution.block_end[k]
         ## If no other tasks assigned in the same day
-        if task.day not in self.blocks:
-            ## check if task.hour within possible hours for current day
-            if not (self.available[task.day][0] <= task.hour <= self.available[task.day][1]):
-                return False
+        if block_end < 0:
             ## check if after total_hours < wmax after adding block
-            if self.total_hours + 1 > self.wmax:
+            if solution.hours[self.index] + 1 > profile.wmax:
                 return False
         else:
             ## If there are other tasks assigned in the same day
-            block_start, block_end = self.blocks[task.day]
+            block_start = solution.block_start[k]
             ## if the task fits within the existing range
             if block_start <= task.hour <= block_end:
                 # at this point it's assured that no task overlaps already
                 return True
             ## otherwise check if new range after task is assigned is rmin feasible
             if task.hour < block_start: # task is earlier
-                if block_start - task.hour > self.rmin:
+                if block_start - task.hour > profile.rmin:
                     return False
             elif task.hour > block_end: # task is later
-                if task.hour - block_end > self.rmin:
+                if task.hour - block_end > profile.rmin:
                     return False
             # check if new range after task is assigned is within bmax and wmax
             new_block_start = min(block_start, task.hour)
             new_block_end = max(block_end, task.hour)
-            if new_block_end - new_block_start + 1 > self.bmax:
+            if new_block_end - new_block_start + 1 > profile.bmax:
                 return False
-            if self.total_hours + 1 > self.wmax:
+            if solution.hours[self.index] + 1 > profile.wmax:
                 return False
 
         return True
@@ -138,91 +228,560 @@ class Worker(object):
     def assign_task(self, task):
         # // Implement Code Here
         # assume that the task can be assigned first before calling this function
-
-        self.tasks_assigned.append(task)
-        self.total_hours += 1
-
-        if task.day in self.blocks:
-            block_start, block_end = self.blocks[task.day]
-            self.blocks[task.day] = [min(block_start, task.hour), max(block_end, task.hour)]
-        else:
-            self.blocks[task.day] = [task.hour, task.hour]
-
+        self._state.assign_task(self, task)
 
     def remove_task(self, task_id):
          # // Implement Code Here
-        task_to_remove = None
-        for task in self.tasks_assigned:
-            if task.id == task_id:
-                task_to_remove = task
-                break
-
-        if task_to_remove is None:
-            # task doesn't exist
-            return False
-
-        self.tasks_assigned.remove(task_to_remove)
-        self.total_hours -= 1
-
-        # Update blocks
-        if task_to_remove.day in self.blocks:
-            block_start, block_end = self.blocks[task_to_remove.day]
-            if block_start == task_to_remove.hour or block_end == task_to_remove.hour:
-                # Recalculate the block for the day
-                hours = [t.hour for t in self.tasks_assigned if t.day == task_to_remove.day]
-                if hours:
-                    self.blocks[task_to_remove.day] = [min(hours), max(hours)]
-                else: # if no blocks left that day, delete the key
-                    del self.blocks[task_to_remove.day]
-
-        return True
+        return self._state.remove_task(self, task_id)
 
     def get_objective(self):
         # this is basically just counting how many hours this worker works in
-        # for the entirety of the period
-        t = sum(x[1] - x[0] + 1 for x in self.blocks.values())
-        return t * self.rate
+        # for the entirety of the period, maintained by PSP.assign_task/remove_task
+        return self._solution.block_hours[self.index] * self.profile.rate
+
+    def get_objective_with(self, task):
+        # get_objective as if the task were assigned, without assigning it
+        solution, k = self._solution, self._offset + task.day
+        block_start, block_end = solution.block_start[k], solution.block_end[k]
+        if block_end >= 0:
+            extra_hours = max(block_end, task.hour) - min(block_start, task.hour) - (block_end - block_start)
+        else:
+            extra_hours = 1
+        return (solution.block_hours[self.index] + extra_hours) * self.profile.rate
 
     def __repr__(self):
-        if len(self.blocks) == 0:
+        blocks = self.blocks
+        if len(blocks) == 0:
             return ""
+        tasks = self.tasks_assigned
         return "\n".join(
             [
-                f"Worker {self.id}: Day {d} Hours {self.blocks[d]} Tasks {sorted([t.id for t in self.tasks_assigned if t.day == d])}"
-                for d in sorted(self.blocks.keys())
+                f"Worker {self.id}: Day {d} Hours {blocks[d]} Tasks {sorted([t.id for t in tasks if t.day == d])}"
+                for d in sorted(blocks.keys())
             ]
         )
 
 
 class Task(object):
-    def __init__(self, data):
-        self.id = data["t_id"]
-        self.skill = data["skill"]
-        self.day = data["day"]
-        self.hour = data["hour"]
+    # tasks never change during a run, so every state of an instance shares the same Task objects
+    __slots__ = ("id", "skill", "day", "hour")
 
+    def __init__(self, t_id, skill, day, hour):
+        self.id = t_id
+        self.skill = skill
+        self.day = day
+        self.hour = hour
 
-### PSP state class ###
-# PSP state class. You could and should add your own helper functions to the class
-# But please keep the rest untouched!
-class PSP(State):
-    def __init__(self, name, workers, tasks, alpha):
-        """Initialize the PSP state
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class IndexedSet(object):
+    def __init__(self, items=()):
+        """A set with O(1) add, remove and uniform random sampling, backed by a dense list
+        and a map from each item to its position in that list.
+        Iterating goes over a snapshot of the items, so the set can be modified while iterating
+        without skipping items. The order is the insertion order, until items are removed:
+        removing moves the last item into the freed position.
+        """
+        self._items = []
+        self._positions = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        if item not in self._positions:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+
+    def remove(self, item):
+        # raises KeyError if the item is not in the set
+        position = self._positions.pop(item)
+        last = self._items.pop()
+        if position < len(self._items):
+            self._items[position] = last
+            self._positions[last] = position
+
+    def discard(self, item):
+        if item in self._positions:
+            self.remove(item)
+
+    def sample(self, random_state):
+        """Return an item chosen uniformly at random, using a numpy RandomState"""
+        return self._items[random_state.randint(len(self._items))]
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __len__(self):
+        return len(self._items)
+
+    def copy(self):
+        copied = IndexedSet.__new__(IndexedSet)
+        copied._items = self._items.copy()
+        copied._positions = self._positions.copy()
+        return copied
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __repr__(self):
+        return f"IndexedSet({self._items})"
+
+
+class UnassignedTasks(object):
+    def __init__(self, task_ids, task_by_id):
+        """The unassigned tasks of a state, as Task objects. A view on the IndexedSet of
+        unassigned task ids of a PSPSolution, see IndexedSet for the iteration order
+        """
+        self._task_ids = task_ids
+        self._task_by_id = task_by_id
+
+    def sample(self, random_state):
+        """Return a task chosen uniformly at random, using a numpy RandomState"""
+        return self._task_by_id[self._task_ids.sample(random_state)]
+
+    def __contains__(self, task):
+        return task.id in self._task_ids
+
+    def __len__(self):
+        return len(self._task_ids)
+
+    def __iter__(self):
+        task_by_id = self._task_by_id
+        return (task_by_id[task_id] for task_id in self._task_ids)
+
+    def __repr__(self):
+        return f"UnassignedTasks({[task.id for task in self]})"
+
+
+class PSPInstance(object):
+    def __init__(self, name, alpha, workers, tasks):
+        """The static data of a PSP instance, which never changes during a run and is shared
+        by all states of it
         Args:
             name::str
                 name of the instance
-            workers::[Worker]
-                workers of the instance
+            alpha::int
+                cost of each unassigned task
+            workers::[WorkerProfile]
+                the static data of the workers
             tasks::[Task]
                 tasks of the instance
+        Attributes:
+            num_days::int
+                number of days, the second dimension of the (worker x day) arrays
+            task_by_id::[Task]
+                the tasks by task id
+            task_groups::[(int)]
+                the ids of the tasks with the same skill, day and hour, which are interchangeable
+            group_of::[int]
+                per task id, its index in task_groups
+            worker_classes::[(int)]
+                the positions of the workers with the same skills, availability, rate and limits
+            class_of::[int]
+                per worker, its index in worker_classes
+            unassignable::(int)
+                the ids of the tasks without any eligible worker. They are left out of the unassigned
+                tasks of a solution, and count towards f1 as a fixed penalty
+            skill_codes::{k: v}
+                key is the skill, value is its column in worker_skills
+            worker_skills::np.ndarray
+                (workers x skills) bool, whether the worker has the skill
+            available_from, available_to::np.ndarray
+                (workers x days) int, the first and last available hour of the worker on the day,
+                an empty range if the worker is not available that day
+            rate, bmax, wmax, rmin::np.ndarray
+                per worker, as in Worker
+            task_skill, task_day, task_hour::np.ndarray
+                per task id, the skill code, day and hour of the task
+            rate_order::[int]
+                positions of the workers, cheapest rate first
+            rate_rank::[int]
+                per worker, its index in rate_order
+            num_hours::int
+                number of hours in a day, the width of the hour masks
+            skill_workers::{k: v}
+                key is the skill, value is the mask of the workers that have it (bit r for rate_order[r])
+            available_hours::[int]
+                per worker and day (index worker * num_days + day), the mask of the available hours
+            empty_open_hours::array
+                PSPSolution.open_hours of a solution without any tasks
+            empty_slot_workers::[int]
+                PSPSolution.slot_workers of a solution without any tasks
         """
         self.name = name
+        self.Alpha = alpha
         self.workers = workers
         self.tasks = tasks
-        self.Alpha = alpha
-        # the tasks assigned to each worker, eg. [worker1.tasks_assigned, worker2.tasks_assigned, ..., workerN.tasks_assigned]
-        self.solution = []
-        self.unassigned = list(tasks)
+
+        # the same arrays as the compiled instances of src.instance_cache, built from the objects
+        skill_names = sorted({skill for worker in workers for skill in worker.skills} | {task.skill for task in tasks})
+        skill_codes = {skill: code for code, skill in enumerate(skill_names)}
+        num_days = max(
+            [worker.T for worker in workers]
+            + [day + 1 for worker in workers for day in worker.available]
+            + [task.day + 1 for task in tasks]
+        )
+        worker_skills = np.zeros((len(workers), len(skill_names)), dtype=bool)
+        worker_available = np.full((len(workers), num_days, 2), -1, dtype=np.int64)
+        for w, worker in enumerate(workers):
+            worker_skills[w, [skill_codes[skill] for skill in worker.skills]] = True
+            for day, (first_hour, last_hour) in worker.available.items():
+                worker_available[w, day] = first_hour, last_hour
+
+        self._load_arrays(presolve_instance({
+            "skill_names": skill_names,
+            "worker_rate": np.array([worker.rate for worker in workers], dtype=np.int64),
+            "worker_bmax": np.array([worker.bmax for worker in workers], dtype=np.int64),
+            "worker_wmax": np.array([worker.wmax for worker in workers], dtype=np.int64),
+            "worker_rmin": np.array([worker.rmin for worker in workers], dtype=np.int64),
+            "worker_skills": worker_skills,
+            "worker_available": worker_available,
+            "task_id": np.array([task.id for task in tasks], dtype=np.int64),
+            "task_skill": np.array([skill_codes[task.skill] for task in tasks], dtype=np.int64),
+            "task_day": np.array([task.day for task in tasks], dtype=np.int64),
+            "task_hour": np.array([task.hour for task in tasks], dtype=np.int64),
+        }))
+
+    @classmethod
+    def from_compiled(cls, compiled):
+        """Build an instance from the compiled arrays of an instance file, see
+        src.instance_cache.compile_instance. The presolve is part of the compiled arrays, so only
+        the worker and task objects are built, and the rest is converted from the arrays
+        """
+        instance = cls.__new__(cls)
+        alpha, T, bmax, wmax, rmin = compiled["scalars"].tolist()
+        skill_names = compiled["skill_names"]
+        instance.name = compiled["name"]
+        instance.Alpha = alpha
+
+        # the available days of all workers and their (first, last) hours, worker after worker
+        available = compiled["worker_available"]
+        worker_of, days = np.nonzero(available[:, :, 0] >= 0)
+        hours = list(zip(available[worker_of, days, 0].tolist(), available[worker_of, days, 1].tolist()))
+        days = days.tolist()
+        ends = np.cumsum(np.bincount(worker_of, minlength=len(available))).tolist()
+        instance.workers = [
+            WorkerProfile(
+                w_id, compress(skill_names, skills), dict(zip(days[start:end], hours[start:end])),
+                rate, T, bmax, wmax, rmin,
+            )
+            for w_id, skills, rate, start, end in zip(
+                compiled["worker_id"].tolist(), compiled["worker_skills"].tolist(), compiled["worker_rate"].tolist(),
+                [0] + ends[:-1], ends,
+            )
+        ]
+        instance.tasks = list(map(
+            Task, compiled["task_id"].tolist(), map(skill_names.__getitem__, compiled["task_skill"].tolist()),
+            compiled["task_day"].tolist(), compiled["task_hour"].tolist(),
+        ))
+        instance._load_arrays(compiled)
+        return instance
+
+    def _load_arrays(self, arrays):
+        """Set the attributes from the compiled and presolved arrays of the instance, see
+        src.instance_cache.presolve_instance. The arrays are copied or converted, as they may be
+        views on a cache file or a shared memory block
+        """
+        self.num_days, self.num_hours = arrays["dims"].tolist()
+        self.skill_codes = {skill: code for code, skill in enumerate(arrays["skill_names"])}
+        available = arrays["worker_available"]
+        is_available = available[:, :, 0] >= 0
+        self.worker_skills = arrays["worker_skills"].copy()
+        self.available_from = np.where(is_available, available[:, :, 0], 0)
+        self.available_to = np.where(is_available, available[:, :, 1], -1)
+        self.rate = arrays["worker_rate"].copy()
+        self.bmax = arrays["worker_bmax"].copy()
+        self.wmax = arrays["worker_wmax"].copy()
+        self.rmin = arrays["worker_rmin"].copy()
+
+        task_id = arrays["task_id"]
+        num_ids = int(task_id.max(initial=-1)) + 1
+        by_id = {}
+        for name in ("task_skill", "task_day", "task_hour", "task_group"):
+            by_id[name] = np.full(num_ids, -1 if name == "task_group" else 0, dtype=np.int64)
+            by_id[name][task_id] = arrays[name]
+        if len(task_id) == num_ids and np.array_equal(task_id, np.arange(num_ids)):
+            self.task_by_id = list(self.tasks)
+        else:
+            self.task_by_id = [None] * num_ids
+            for t_id, task in zip(task_id.tolist(), self.tasks):
+                self.task_by_id[t_id] = task
+        self.task_skill, self.task_day, self.task_hour = by_id["task_skill"], by_id["task_day"], by_id["task_hour"]
+        self.group_of = by_id["task_group"].tolist()
+        self.class_of = arrays["worker_class"].tolist()
+        self.unassignable = tuple(arrays["unassignable"].tolist())
+
+        self.rate_order = arrays["rate_order"].tolist()
+        self.rate_rank = np.argsort(arrays["rate_order"]).tolist()
+        # skill_codes lists the skills in the order of their codes
+        self.skill_workers = dict(zip(self.skill_codes, _masks(arrays["skill_workers"])))
+        self.available_hours = arrays["available_hours"].ravel().tolist()
+        self.empty_open_hours = array("q", arrays["open_hours"].tobytes())
+        self.empty_slot_workers = _masks(arrays["slot_workers"])
+
+    @cached_property
+    def task_groups(self):
+        # built on first use from group_of, as only the lower bound needs the groups as a whole
+        groups = {}
+        for task in self.tasks:
+            groups.setdefault(self.group_of[task.id], []).append(task.id)
+        return [tuple(task_ids) for task_ids in groups.values()]
+
+    @cached_property
+    def worker_classes(self):
+        # built on first use from class_of
+        classes = {}
+        for w, c in enumerate(self.class_of):
+            classes.setdefault(c, []).append(w)
+        return [tuple(positions) for positions in classes.values()]
+
+    def lower_bound(self):
+        """Compute a lower bound on the objective value of any solution of the instance.
+        The blocks are relaxed away: each assigned task is paid as one hour of its worker,
+        and the only constraint kept is that a worker does one task at a time. The slots
+        (day, hour) are then independent, and each is solved exactly as a matching of its tasks
+        to eligible workers, where a task costs the rate of its worker, or Alpha if unassigned.
+        The tasks of a slot with the same skill are interchangeable, so the matching is kept as
+        counts of workers per skill and skill set, see _augment
+        Returns:
+            bound::int
+                the lower bound
+        """
+        num_skills = len(self.skill_codes)
+        rate = self.rate[self.rate_order]
+        # per worker in rate order, its skills as a bitmask over the skill codes
+        skill_masks = (self.worker_skills[self.rate_order].astype(np.int64) << np.arange(num_skills)).sum(axis=1)
+        skill_bits = {}
+
+        slots = {}
+        for task_ids in self.task_groups:
+            task = self.task_by_id[task_ids[0]]
+            slots.setdefault((task.day, task.hour), {})[self.skill_codes[task.skill]] = len(task_ids)
+
+        bound = 0
+        for (day, hour), capacity in slots.items():
+            bound += self.Alpha * sum(capacity.values())
+            slot_mask = sum(1 << code for code in capacity)
+            available = (self.available_from[self.rate_order, day] <= hour) & (hour <= self.available_to[self.rate_order, day])
+            # the workers that can take a task of the slot, cheapest first, with the skills they can use
+            positions = np.flatnonzero(available & (skill_masks & slot_mask != 0) & (rate < self.Alpha))
+
+            # the sets of workers that can be matched form a matroid, so adding the cheapest workers
+            # first whenever they can still be matched gives a matching of minimum cost.
+            # A worker that cannot be added makes all later workers with the same skills fail too
+            free = dict(capacity)
+            placed = {code: {} for code in capacity}
+            unmatched = sum(capacity.values())
+            failed = set()
+            for r, mask in zip(positions.tolist(), (skill_masks[positions] & slot_mask).tolist()):
+                if mask in failed:
+                    continue
+                if mask not in skill_bits:
+                    skill_bits[mask] = [code for code in range(num_skills) if mask >> code & 1]
+                if self._augment(mask, skill_bits, free, placed):
+                    bound += int(rate[r]) - self.Alpha
+                    unmatched -= 1
+                    if unmatched == 0:
+                        break
+                else:
+                    failed.add(mask)
+        return bound
+
+    @staticmethod
+    def _augment(mask, skill_bits, free, placed):
+        """Match a worker with the skills of mask to a task of the slot, moving matched workers to
+        other skills along an augmenting path if needed, cf. Kuhn's algorithm
+        Args:
+            free::{k: v}
+                key is the skill code, value is the number of its tasks without a worker
+            placed::{k: v}
+                key is the skill code, value is a dict of the number of workers matched to its tasks,
+                by skill mask
+        Returns:
+            augmented::bool
+                whether the worker could be matched
+        """
+        # breadth-first search over the skills, an edge s -> t moves a worker matched to s to t
+        parent = {code: None for code in skill_bits[mask]}
+        queue = list(parent)
+        for code in queue:
+            if free[code] > 0:
+                free[code] -= 1
+                while parent[code] is not None:
+                    source, moved = parent[code]
+                    placed[source][moved] -= 1
+                    placed[code][moved] = placed[code].get(moved, 0) + 1
+                    code = source
+                placed[code][mask] = placed[code].get(mask, 0) + 1
+                return True
+            for moved, count in placed[code].items():
+                if count > 0:
+                    for target in skill_bits[moved]:
+                        if target not in parent:
+                            parent[target] = (code, moved)
+                            queue.append(target)
+        return False
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        # immutable, so every copy of a state refers to the same instance
+        return self
+
+
+def _masks(packed):
+    """Return the bitmasks packed in the rows of a uint8 array, see src.instance_cache.presolve_instance"""
+    size = packed.shape[1]
+    if size == 0:
+        return [0] * len(packed)
+    packed = packed.tobytes()
+    return [int.from_bytes(packed[start:start + size], "little") for start in range(0, len(packed), size)]
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def zobrist_key(task_id, w):
+    """Return the 64-bit random key of assigning a task to the worker at position w.
+    The keys are generated by the splitmix64 mixer, which is a bijection on 64-bit integers,
+    so distinct pairs get distinct keys and no (tasks x workers) table has to be stored
+    """
+    z = ((task_id << 32 | w) + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class PSPSolution(object):
+    __slots__ = (
+        "assignment", "block_start", "block_end", "occupancy",
+        "hours", "block_hours", "unassigned", "f2", "fingerprint", "open_hours", "slot_workers",
+        "assigned_order", "next_order",
+    )
+
+    def __init__(self, instance):
+        """The assignment data of a PSP state, as small integer arrays. Solutions are cheap to
+        copy and pickle, as they do not refer to the instance
+        Attributes:
+            assignment::array
+                per task id, the position of the worker the task is assigned to, -1 if unassigned
+            block_start, block_end::array
+                per worker and day (index worker * num_days + day), the first and last hour of the
+                worker's block on that day, -1 if the worker has no block that day
+            occupancy::array
+                per worker and day, a bitmask of the hours taken (bit h is set when a task at hour h
+                is assigned)
+            hours::array
+                per worker, the total working hours
+            block_hours::array
+                per worker, the total length of all blocks, i.e. the number of hours paid for
+            unassigned::IndexedSet
+                the ids of the unassigned tasks, except those of instance.unassignable
+            f2::int
+                the f2 part of the objective
+            fingerprint::int
+                64-bit Zobrist hash of the assignment: the XOR of zobrist_key(task id, worker position)
+                over the assigned tasks, 0 for the empty assignment
+            open_hours::array
+                per worker and day, the mask of the hours at which the worker could take a task
+                of a skill it has, i.e. that pass Worker.can_assign
+            slot_workers::[int]
+                per day and hour (index day * num_hours + hour), the mask of the workers open at that
+                hour (bit r for instance.rate_order[r]), the transpose of open_hours
+            assigned_order::array
+                per task id, the value of next_order when the task was last assigned, which orders
+                Worker.tasks_assigned by assignment
+            next_order::int
+                the number of assignments made so far
+        """
+        num_workers, num_days = len(instance.workers), instance.num_days
+        worker_type = "h" if num_workers < 2 ** 15 else "i"
+        self.assignment = array(worker_type, [-1]) * len(instance.task_by_id)
+        self.block_start = array("h", [-1]) * (num_workers * num_days)
+        self.block_end = array("h", [-1]) * (num_workers * num_days)
+        self.occupancy = array("q", [0]) * (num_workers * num_days)
+        self.hours = array("i", [0]) * num_workers
+        self.block_hours = array("i", [0]) * num_workers
+        unassignable = set(instance.unassignable)
+        self.unassigned = IndexedSet(task.id for task in instance.tasks if task.id not in unassignable)
+        self.f2 = 0
+        self.fingerprint = 0
+        self.assigned_order = array("q", [-1]) * len(instance.task_by_id)
+        self.next_order = 0
+
+        # without any tasks, workers are open at all available hours, unless wmax is 0
+        self.open_hours = instance.empty_open_hours[:]
+        self.slot_workers = instance.empty_slot_workers.copy()
+
+    def assignment_array(self):
+        """The assignment as a numpy array, without copying"""
+        return np.frombuffer(self.assignment, dtype=np.int16 if self.assignment.typecode == "h" else np.int32)
+
+    def copy(self):
+        copied = PSPSolution.__new__(PSPSolution)
+        copied.assignment = self.assignment[:]
+        copied.block_start = self.block_start[:]
+        copied.block_end = self.block_end[:]
+        copied.occupancy = self.occupancy[:]
+        copied.hours = self.hours[:]
+        copied.block_hours = self.block_hours[:]
+        copied.unassigned = self.unassigned.copy()
+        copied.f2 = self.f2
+        copied.fingerprint = self.fingerprint
+        copied.open_hours = self.open_hours[:]
+        copied.slot_workers = self.slot_workers.copy()
+        copied.assigned_order = self.assigned_order[:]
+        copied.next_order = self.next_order
+        return copied
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+### PSP state class ###
+# PSP state class. You could and should add your own helper functions to the class
+# But please keep the rest untouched!
+class PSP(TransactionalState, EncodableState):
+    # when True, objective() cross-checks the cached value against a full recompute
+    debug = False
+
+    def __init__(self, instance, solution=None):
+        """Initialize the PSP state
+        Args:
+            instance::PSPInstance
+                the instance, shared with the copies of this state
+            solution::PSPSolution
+                the assignment data, an empty solution if not given
+        """
+        self.instance = instance
+        self.name = instance.name
+        self.tasks = instance.tasks
+        self.Alpha = instance.Alpha
+        if solution is None:
+            solution = PSPSolution(instance)
+        self.solution = solution
+        # the tasks that operators may assign, and those that can never be assigned
+        self.unassigned = UnassignedTasks(solution.unassigned, instance.task_by_id)
+        self.unassignable = [instance.task_by_id[task_id] for task_id in instance.unassignable]
+        # the position in self.workers of the worker each task id is assigned to, -1 if unassigned
+        self.assignment = solution.assignment
+        # workers of the instance, the order of this list should not be changed
+        self.workers = [Worker(profile, self, w) for w, profile in enumerate(instance.workers)]
+        # the moves made since begin(), as (assigned, worker, task, order) tuples, where order is the
+        # place of a removed task in the assignment order, or None outside a transaction
+        self._journal = None
+        # the number of assignments made before begin()
+        self._journal_order = 0
 
     def random_initialize(self, seed=None):
         """
@@ -242,13 +801,13 @@ class PSP(State):
         # // This should contain your construction heuristic for initial solution
         # // Use Worker class methods to check if assignment is valid
         # -----------------------------------------------------------
-        
-        # Logic: 
+
+        # Logic:
         #   - workers that have rare skills should be assigned the jobs with the rare skill requirements first
         #     before being assigned to anything else.
         #   - the first worker to accept will be the cheapest that can do this task
 
-        # Sort tasks by skill requirement. Tasks with rarest available skills should be prioritized
+        # Sort task groups by skill requirement. Tasks with rarest available skills should be prioritized
         skill_availability = {}
         for worker in self.workers:
             for skill in worker.skills:
@@ -258,25 +817,387 @@ class PSP(State):
                     skill_availability[skill] = 1
 
         M_big_number = len(self.workers) + 1 # number of appearance should not exceed this big number
-        self.tasks.sort(key=lambda task: (skill_availability.get(task.skill, M_big_number)))
-        # Sort workers based on cheapest rates
-        self.workers.sort(key=lambda worker: worker.rate)
+        groups = sorted(self.unassigned_groups(), key=lambda tasks: (skill_availability.get(tasks[0].skill, M_big_number)))
 
-        for task in self.tasks:
-            # for each worker, if can be assigned, assign
-            for worker in self.workers:
-                if worker.can_assign(task):
-                    worker.assign_task(task)
-                    self.unassigned.remove(task)
-                    break
+        for tasks in groups:
+            # the cheapest workers that can be assigned, one per task of the group
+            for task, worker in zip(tasks, self.free_workers(tasks[0])):
+                self.assign_task(worker, task)
+
+    def assign_task(self, worker, task):
+        """Assign an unassigned task to the worker, keeping the objective up to date
+        Args:
+            worker::Worker
+                a worker of this state that can take the task
+            task::Task
+                a task in self.unassigned
+        """
+        solution, w = self.solution, worker.index
+        k = worker._offset + task.day
+        cost = self._worker_cost(w)
+
+        solution.assignment[task.id] = w
+        solution.unassigned.remove(task.id)
+        solution.assigned_order[task.id] = solution.next_order
+        solution.next_order += 1
+        solution.hours[w] += 1
+        solution.occupancy[k] |= 1 << task.hour
+
+        block_start, block_end = solution.block_start[k], solution.block_end[k]
+        if block_end >= 0:
+            new_block_start, new_block_end = min(block_start, task.hour), max(block_end, task.hour)
+            solution.block_hours[w] += (new_block_end - new_block_start) - (block_end - block_start)
+        else:
+            new_block_start = new_block_end = task.hour
+            solution.block_hours[w] += 1
+        solution.block_start[k], solution.block_end[k] = new_block_start, new_block_end
+
+        solution.f2 += self._worker_cost(w) - cost
+        solution.fingerprint ^= zobrist_key(task.id, w)
+        # reaching wmax closes the hours outside the blocks on all days
+        self._update_slots(w, task.day, solution.hours[w] == worker.profile.wmax)
+
+        if self._journal is not None:
+            self._journal.append((True, worker, task, None))
+
+    def remove_task(self, worker, task_id):
+        """Remove a task from the worker and put it back to unassigned,
+        keeping the objective up to date
+        Args:
+            worker::Worker
+                a worker of this state
+            task_id::int
+                id of the task to remove
+        Returns:
+            removed::bool
+                False if the task is not assigned to the worker
+        """
+        solution, w = self.solution, worker.index
+        if solution.assignment[task_id] != w:
+            return False
+
+        task = self.instance.task_by_id[task_id]
+        k = worker._offset + task.day
+        cost = self._worker_cost(w)
+
+        solution.assignment[task_id] = -1
+        solution.unassigned.add(task_id)
+        solution.hours[w] -= 1
+
+        # the block spans from the lowest to the highest occupied hour, if any
+        mask = solution.occupancy[k] & ~(1 << task.hour)
+        solution.occupancy[k] = mask
+        solution.block_hours[w] -= solution.block_end[k] - solution.block_start[k] + 1
+        if mask:
+            block_start, block_end = (mask & -mask).bit_length() - 1, mask.bit_length() - 1
+            solution.block_hours[w] += block_end - block_start + 1
+        else:
+            block_start = block_end = -1
+        solution.block_start[k], solution.block_end[k] = block_start, block_end
+
+        solution.f2 += self._worker_cost(w) - cost
+        solution.fingerprint ^= zobrist_key(task_id, w)
+        self._update_slots(w, task.day, solution.hours[w] == worker.profile.wmax - 1)
+
+        if self._journal is not None:
+            self._journal.append((False, worker, task, solution.assigned_order[task_id]))
+        return True
+
+    @property
+    def fingerprint(self):
+        """64-bit hash of the assignment, maintained in O(1) per move. Equal assignments
+        of an instance have equal fingerprints, whatever the order of the moves
+        """
+        return self.solution.fingerprint
+
+    def free_workers(self, task):
+        """Iterate over the workers that can take the task, cheapest rate first,
+        using the slot index of the solution. Equivalent to checking Worker.can_assign
+        for the eligible workers, but only visits the workers that pass.
+        The workers are those that pass when the iteration starts: assigning the task, or a task
+        of its group, to one of them does not affect the others, so the next worker can take
+        the next task of the group
+        """
+        instance = self.instance
+        mask = (
+            self.solution.slot_workers[task.day * instance.num_hours + task.hour]
+            & instance.skill_workers[task.skill]
+        )
+        while mask:
+            low = mask & -mask
+            yield self.workers[instance.rate_order[low.bit_length() - 1]]
+            mask ^= low
+
+    def _open_hours(self, w, k):
+        # the hours at which the worker could take a task on the day k, cf. Worker.can_schedule
+        instance, solution = self.instance, self.solution
+        profile = instance.workers[w]
+        block_start, block_end = solution.block_start[k], solution.block_end[k]
+        if solution.hours[w] + 1 <= profile.wmax:
+            if block_end < 0:
+                return instance.available_hours[k]
+            # the block may be extended within rmin of its ends and up to bmax hours
+            first = max(block_start - profile.rmin, block_end - profile.bmax + 1, 0)
+            last = min(block_end + profile.rmin, block_start + profile.bmax - 1)
+        elif block_end < 0:
+            return 0
+        else:
+            # only the free hours within the block are left
+            first, last = block_start, block_end
+        span = (1 << last + 1) - (1 << first)
+        return span & ~solution.occupancy[k] & instance.available_hours[k]
+
+    def _update_slots(self, w, day, all_days):
+        # update the slot index after a change of the worker's schedule on the day,
+        # or on all days when the worker reached or left wmax
+        instance, solution = self.instance, self.solution
+        num_days, num_hours = instance.num_days, instance.num_hours
+        bit = 1 << instance.rate_rank[w]
+        for d in range(num_days) if all_days else (day,):
+            k = w * num_days + d
+            open_hours = self._open_hours(w, k)
+            changed = solution.open_hours[k] ^ open_hours
+            if not changed:
+                continue
+            solution.open_hours[k] = open_hours
+            while changed:
+                low = changed & -changed
+                solution.slot_workers[d * num_hours + low.bit_length() - 1] ^= bit
+                changed ^= low
+
+    def idle_class(self, worker):
+        """Return the index of the worker's class in PSPInstance.worker_classes if the worker is idle,
+        otherwise None. Idle workers of the same class are interchangeable, so a move needs only be
+        evaluated for one of them
+        """
+        if self.solution.hours[worker.index] == 0:
+            return self.instance.class_of[worker.index]
+        return None
+
+    def unassigned_groups(self):
+        """Group the unassigned tasks, see PSPInstance.task_groups
+        Returns:
+            groups::[[Task]]
+                the unassigned tasks of each group that has any, in the order of self.unassigned
+        """
+        group_of = self.instance.group_of
+        groups = {}
+        for task in self.unassigned:
+            groups.setdefault(group_of[task.id], []).append(task)
+        return list(groups.values())
+
+    def worker_of(self, task):
+        """Return the worker the task is assigned to, or None if it is unassigned"""
+        w = self.assignment[task.id]
+        return self.workers[w] if w >= 0 else None
+
+    def feasibility_matrix(self, tasks=None, workers=None):
+        """Check Worker.can_assign for every pair of workers and tasks at once
+        Args:
+            tasks::[Task]
+                the columns, all unassigned tasks if not given
+            workers::[int]
+                the rows, as positions in self.workers, all workers if not given
+        Returns:
+            feasible::np.ndarray
+                (workers x tasks) bool, whether the task can be assigned to the worker
+        """
+        return self.assignment_costs(tasks, workers)[0]
+
+    def assignment_costs(self, tasks=None, workers=None):
+        """Check Worker.can_assign and compute the increase of the objective for every pair
+        of workers and tasks at once, see feasibility_matrix for the arguments
+        Returns:
+            feasible::np.ndarray
+                (workers x tasks) bool, whether the task can be assigned to the worker
+            cost_increase::np.ndarray
+                (workers x tasks) int, the increase of f2 if the task were assigned to the worker,
+                only meaningful where feasible
+        """
+        if tasks is None:
+            tasks = list(self.unassigned)
+        if workers is None:
+            workers = range(len(self.workers))
+        workers = np.asarray(workers, dtype=np.int64)
+        instance, solution = self.instance, self.solution
+        shape = (len(instance.workers), instance.num_days)
+
+        # the current schedules of the workers, without a block as an empty range
+        block_start = np.frombuffer(solution.block_start, dtype=np.int16).reshape(shape)[workers]
+        block_end = np.frombuffer(solution.block_end, dtype=np.int16).reshape(shape)[workers]
+        occupancy = np.frombuffer(solution.occupancy, dtype=np.int64).reshape(shape)[workers]
+        total_hours = np.frombuffer(solution.hours, dtype=np.int32)[workers]
+        block_hours = np.frombuffer(solution.block_hours, dtype=np.int32)[workers].astype(np.int64)
+
+        ids = np.array([task.id for task in tasks], dtype=np.int64)
+        day, hour = instance.task_day[ids], instance.task_hour[ids]
+        rmin, bmax = instance.rmin[workers, None], instance.bmax[workers, None]
+
+        # static checks, cf. Worker.is_eligible
+        feasible = instance.worker_skills[workers[:, None], instance.task_skill[ids]]
+        feasible &= (instance.available_from[workers[:, None], day] <= hour)
+        feasible &= (hour <= instance.available_to[workers[:, None], day])
+
+        # dynamic checks, cf. Worker.can_schedule
+        feasible &= (occupancy[:, day] >> hour & 1) == 0
+        start, end = block_start[:, day].astype(np.int64), block_end[:, day].astype(np.int64)
+        has_block = end >= 0
+        within_block = has_block & (start <= hour) & (hour <= end)
+        within_hours = (total_hours + 1 <= instance.wmax[workers])[:, None]
+        new_start, new_end = np.minimum(start, hour), np.maximum(end, hour)
+        extends_block = (
+            has_block
+            & (start - hour <= rmin)
+            & (hour - end <= rmin)
+            & (new_end - new_start + 1 <= bmax)
+            & within_hours
+        )
+        feasible &= within_block | extends_block | (~has_block & within_hours)
+
+        # f2 before and after, with the minimum payment for workers that work at all
+        extra_hours = np.where(has_block, (new_end - new_start) - (end - start), 1)
+        rate = instance.rate[workers]
+        cost = np.where(block_hours > 0, np.maximum(block_hours * rate, 50), 0)
+        new_cost = np.maximum((block_hours[:, None] + extra_hours) * rate[:, None], 50)
+        return feasible, new_cost - cost[:, None]
+
+    def _worker_cost(self, w):
+        # contribution of a worker to f2, with the minimum payment for workers that work at all
+        objective = self.solution.block_hours[w] * self.instance.workers[w].rate
+        return max(objective, 50) if objective > 0 else 0
 
     def copy(self):
-        return copy.deepcopy(self)
+        """Copy the solution of the state. The instance data is shared with the copy"""
+        return PSP(self.instance, self.solution.copy())
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def encode(self):
+        """Return a compact, hashable encoding of the solution: the assignment packed into bytes
+        (int16 per task, or int32 for instances with 2**15 workers or more) and the objective value
+        """
+        return self.solution.assignment.tobytes(), self.objective()
+
+    def decode(self, encoding):
+        """Return a new state of this instance with the solution of an encoding made by encode()"""
+        assignment = array(self.solution.assignment.typecode)
+        assignment.frombytes(encoding[0])
+        return PSP.from_assignment(self.instance, assignment)
+
+    @classmethod
+    def from_assignment(cls, instance, assignment, check=False):
+        """Return a state of an instance with the tasks assigned as in an assignment
+        Args:
+            instance::PSPInstance
+                the instance
+            assignment::[int]
+                per task id, the position of the worker the task is assigned to, -1 if unassigned,
+                see PSPSolution.assignment
+            check::bool
+                whether to verify that the assignment is feasible for the worker constraints,
+                eg. for an assignment read from a file
+        Raises:
+            ValueError: if check is set and the assignment is not feasible
+        """
+        state = cls(instance)
+        if not check:
+            for task in state.tasks:
+                w = assignment[task.id]
+                if w >= 0:
+                    state.assign_task(state.workers[w], task)
+            return state
+
+        if len(assignment) != len(instance.task_by_id):
+            raise ValueError(f"Assignment should have {len(instance.task_by_id)} tasks, found {len(assignment)}.")
+        for task in state.tasks:
+            w = assignment[task.id]
+            if w < 0:
+                continue
+            if w >= len(state.workers):
+                raise ValueError(f"Task {task.id} is assigned to worker position {w}, out of range.")
+            worker = state.workers[w]
+            if not worker.is_eligible(task) or state.solution.occupancy[worker._offset + task.day] >> task.hour & 1:
+                raise ValueError(f"Task {task.id} cannot be assigned to worker {worker.id}.")
+            state.assign_task(worker, task)
+
+        # the limits of can_schedule that hold for any state reached by assigning and removing tasks.
+        # The rest time is not checked, as removing a task may widen the gaps within a block, nor
+        # the working hours, as can_schedule lets a task into an existing block without checking wmax
+        for worker in state.workers:
+            for day, (block_start, block_end) in worker.blocks.items():
+                if block_end - block_start + 1 > worker.bmax:
+                    raise ValueError(f"Worker {worker.id} has a block longer than {worker.bmax} hours on day {day}.")
+        return state
+
+    @classmethod
+    def from_file(cls, path, instance):
+        """Return a state with the best solution of an instance in a results file, eg. to warm-start
+        a run from it, see src.results.read_solution. The solution is checked for feasibility
+        Raises:
+            ValueError: if the file has no feasible solution of the instance
+        """
+        return cls.from_assignment(instance, read_solution(path, instance.name)["assignment"], check=True)
+
+    def begin(self):
+        """Start a transaction: the moves made from here on are journaled, so that
+        operators can modify this state in place instead of a copy
+        """
+        self._journal = []
+        self._journal_order = self.solution.next_order
+
+    def commit(self):
+        """Keep the moves made since begin() and end the transaction"""
+        self._journal = None
+
+    def rollback(self):
+        """Undo the moves made since begin(), in reverse order, and end the transaction"""
+        journal, self._journal = self._journal, None
+        for assigned, worker, task, order in reversed(journal):
+            if assigned:
+                self.remove_task(worker, task.id)
+            else:
+                self.assign_task(worker, task)
+                # the task gets back its place in the assignment order
+                self.solution.assigned_order[task.id] = order
+        self.solution.next_order = self._journal_order
+
+    def working_copy(self):
+        """Return the state an operator should modify: this state itself while a
+        transaction is open, otherwise a copy of it
+        """
+        return self if self._journal is not None else self.copy()
 
     def objective(self):
         """Calculate the objective value of the state
         Return the total cost of each worker + unassigned cost
         """
-        f1 = len(self.unassigned)
-        f2 = sum(max(worker.get_objective(), 50) for worker in self.workers if worker.get_objective() > 0)
+        f1 = len(self.solution.unassigned) + len(self.instance.unassignable)
+        objective = self.Alpha * f1 + self.solution.f2
+        if self.debug:
+            expected = self.compute_objective()
+            if objective != expected:
+                raise RuntimeError(
+                    f"Cached objective {objective} does not match recomputed objective {expected}."
+                )
+        return objective
+
+    def compute_objective(self):
+        """Recompute the objective value from the assignment alone, without using the cached values"""
+        f1 = 0
+        blocks = {}
+        for task in self.tasks:
+            w = self.assignment[task.id]
+            if w < 0:
+                f1 += 1
+                continue
+            block = blocks.get((w, task.day))
+            blocks[(w, task.day)] = (
+                (task.hour, task.hour) if block is None else (min(block[0], task.hour), max(block[1], task.hour))
+            )
+
+        worker_hours = {}
+        for (w, _), (block_start, block_end) in blocks.items():
+            worker_hours[w] = worker_hours.get(w, 0) + block_end - block_start + 1
+        f2 = sum(max(hours * self.instance.workers[w].rate, 50) for w, hours in worker_hours.items())
         return self.Alpha * f1 + f2
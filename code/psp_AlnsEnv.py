@@ -1,3 +1,4 @@
+import copy
 import os
 
 import gymnasium as gym
@@ -6,13 +7,14 @@ import numpy.random as rnd
 from operators import *
 from psp import PSP, Parser
 from src.alns import ALNS
+from src.instance_cache import InstanceCache, InstanceSource
 from src.settings import DATA_PATH
 
 os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
 
 
 class pspAlnsEnv(gym.Env):
-    def __init__(self, config, **kwargs):
+    def __init__(self, config, instance_pool=None, **kwargs):
         # Parameters
         self.config = config["environment"]
         self.instances_folder = self.config["instances_folder"]
@@ -25,6 +27,30 @@ class pspAlnsEnv(gym.Env):
         else:
             self.instances = [self.config["instances"]]
 
+        # parsed instances are immutable, so episodes on the same instance share them.
+        # Instances in the shared pool of the trainer, if any, are built from its shared memory.
+        # Building an instance from its compiled arrays takes milliseconds, against an episode of
+        # many iterations, so with a pool each environment only keeps a few built instances: the
+        # memory of the environments grows with the cache size, not with the number of training
+        # instances. Without a pool, all the instances are kept by default, as they are drawn at
+        # random and a smaller cache would mostly miss
+        self.instance_pool = instance_pool
+        cache_size = self.config.get("instance_cache_size")
+        if cache_size is None:
+            cache_size = 4 if instance_pool is not None else len(self.instances)
+        self.instance_cache = InstanceCache(self.load_instance, cache_size)
+        # with large instance sets, the next instances are loaded in the background instead,
+        # in a random order that visits every instance once per pass
+        self.instance_source = None
+        if self.config.get("prefetch_instances", 0) > 0:
+            self.instance_source = InstanceSource(
+                self.instance_paths(config),
+                self.instance_cache.get,
+                prefetch=self.config["prefetch_instances"],
+                shuffle=True,
+                cycle=True,
+            )
+
         self.psp = None
         self.rnd_state = None
         self.initial_solution = None
@@ -66,6 +92,37 @@ class pspAlnsEnv(gym.Env):
         )
         # ----------------------------------------------------------------------
 
+    @staticmethod
+    def get_instance_path(config, instance):
+        """
+        Return the path of a training instance, by its number
+        """
+        return os.path.join(
+            DATA_PATH,
+            config["instances_folder"],
+            config["instances_folder"] + "_instance_" + str(instance) + ".json",
+        )
+
+    @classmethod
+    def instance_paths(cls, config):
+        """
+        Return the paths of all training instances of the config, e.g. to share them between workers
+        """
+        config = config["environment"]
+        if isinstance(config["instances"], list):
+            instances = range(config["instances"][0], config["instances"][1])
+        else:
+            instances = [config["instances"]]
+        return [cls.get_instance_path(config, instance) for instance in instances]
+
+    def load_instance(self, path):
+        """
+        Load the instance of a path, from the shared instance pool if it holds the instance
+        """
+        if self.instance_pool is not None and path in self.instance_pool:
+            return Parser(path, compiled=self.instance_pool.compiled(path)).instance
+        return Parser(path).instance
+
     def make_observation(self):
         """
         Return the environment's current state
@@ -118,22 +175,23 @@ class pspAlnsEnv(gym.Env):
             SEED = random.randint(0, 100000)
             self.rnd_state = rnd.RandomState(SEED)
 
-            # Select Problem Instances Randomly
-            self.instance = random.choice(self.instances)
-            print(f"DATA_PATH: {DATA_PATH}")
-            self.instance_path = os.path.join(
-                DATA_PATH,
-                self.instances_folder,
-                self.config["instances_folder"]
-                + "_instance_"
-                + str(self.instance)
-                + ".json",
-            )
-       
-
-        parsed = Parser(self.instance_path)
-        psp = PSP(parsed.name, parsed.workers, parsed.tasks, parsed.Alpha)
-        psp.random_initialize(SEED)
+        if not run and self.instance_source is not None:
+            # the instance was loaded in the background
+            self.instance_path, instance = next(self.instance_source)
+        else:
+            if not run:
+                # Select Problem Instances Randomly
+                self.instance = random.choice(self.instances)
+                print(f"DATA_PATH: {DATA_PATH}")
+                self.instance_path = self.get_instance_path(self.config, self.instance)
+            instance = self.instance_cache.get(self.instance_path)
+
+        if options and options.get("warm_start"):
+            # start from the best known solution of the instance in a results file, see src.results
+            psp = PSP.from_file(options["warm_start"], instance)
+        else:
+            psp = PSP(instance)
+            psp.random_initialize(SEED)
 
         self.psp = psp
         self.initial_solution = psp
@@ -161,7 +219,7 @@ class pspAlnsEnv(gym.Env):
         self.iteration, self.reward = 0, 0
         self.done = False
 
-        return self.make_observation(), {}
+        return self.make_observation(), {"instance_cache": self.instance_cache.stats()}
         
 
     def step(self, action):
@@ -274,14 +332,22 @@ class pspAlnsEnv(gym.Env):
 
     # --------------------------------------------------------------------------------------------------------------------
 
-    def run(self, model, seed = None, episodes = 1):
+    def close(self):
+        """
+        Stop loading instances in the background
+        """
+        if self.instance_source is not None:
+            self.instance_source.close()
+
+    def run(self, model, seed = None, episodes = 1, warm_start = None):
         """
-        Use a trained model to select actions.
+        Use a trained model to select actions, starting from the best solution in the results
+        file warm_start if given.
         """
         try:
             for episode in range(episodes):
                 self.done = False
-                state, _ = self.reset(seed = seed, run = 1)
+                state, _ = self.reset(seed = seed, options = {"warm_start": warm_start}, run = 1)
 
                 while not self.done:
                     state = np.array(state)
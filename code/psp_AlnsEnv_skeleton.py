@@ -1,3 +1,4 @@
+import copy
 import os
 
 import gymnasium as gym
@@ -132,7 +133,7 @@ class pspAlnsEnv(gym.Env):
        
 
         parsed = Parser(self.instance_path)
-        psp = PSP(parsed.name, parsed.workers, parsed.tasks, parsed.Alpha)
+        psp = PSP(parsed.instance)
         psp.random_initialize(SEED)
 
         self.psp = psp
@@ -1,11 +1,12 @@
+import copy
 import warnings
 from collections import OrderedDict
 
 import numpy as np
 import numpy.random as rnd
 
-from .Result import Result
-from .State import State  # pylint: disable=unused-import
+from .Result import Result, optimality_gap
+from .State import EncodableState, EncodedState, State, TransactionalState
 from .Statistics import Statistics
 from .criteria import AcceptanceCriterion  # pylint: disable=unused-import
 from .select_operator import select_operator
@@ -113,7 +114,8 @@ class ALNS:
         self._add_operator(self._repair_operators, operator, name)
 
     def iterate(self, initial_solution, weights, operator_decay, criterion,
-                iterations=10000, collect_stats=True):
+                iterations=10000, collect_stats=True, lower_bound=None,
+                gap_tolerance=None):
         """
         Runs the adaptive large neighbourhood search heuristic [1], using the
         previously set destroy and repair operators. The first solution is set
@@ -140,6 +142,28 @@ class ALNS:
         collect_stats : bool
             Should statistics be collected during iteration? Default True, but
             may be turned off for long runs to reduce memory consumption.
+        lower_bound : float
+            Optional lower bound on the objective value. When passed, the
+            result reports the optimality gap of the best solution.
+        gap_tolerance : float
+            Optional non-negative tolerance on the optimality gap, which
+            requires a lower bound. When passed, the iteration stops as soon as
+            the gap of the best solution is at most this tolerance, e.g. 0 to
+            stop only once the best solution is shown to be optimal.
+
+        Notes
+        -----
+        When the initial solution is a ``TransactionalState``, the operators
+        are applied to a single working copy of it, which they may modify in
+        place. Each iteration opens a transaction on the working copy, which
+        is committed when the candidate is accepted, and rolled back when it is
+        rejected. The working copy is only copied again when it becomes a new
+        global best. Operators that return a new state instead are still
+        supported.
+
+        When the working copy is also an ``EncodableState``, a new global best
+        is kept as its encoding rather than as a copy. The best state is then
+        decoded once, when it is requested from the returned ``Result``.
 
         Raises
         ------
@@ -166,8 +190,20 @@ class ALNS:
 
         self._validate_parameters(weights, operator_decay, iterations)
 
+        if gap_tolerance is not None:
+            if lower_bound is None:
+                raise ValueError("A gap tolerance requires a lower bound.")
+
+            if gap_tolerance < 0:
+                raise ValueError("Negative gap tolerance.")
+
         current = best = initial_solution
 
+        if isinstance(initial_solution, TransactionalState):
+            # The initial solution is kept as the best, and the operators work
+            # on this copy from here on.
+            current = copy.deepcopy(initial_solution)
+
         d_weights = np.ones(len(self.destroy_operators), dtype=np.float16)
         r_weights = np.ones(len(self.repair_operators), dtype=np.float16)
 
@@ -177,22 +213,47 @@ class ALNS:
             statistics.collect_objective(initial_solution.objective())
 
         for iteration in tqdm(range(iterations)):
+            if gap_tolerance is not None \
+                    and optimality_gap(best.objective(),
+                                       lower_bound) <= gap_tolerance:
+                break
+
             d_idx = select_operator(self.destroy_operators, d_weights,
                                     self._rnd_state)
 
             r_idx = select_operator(self.repair_operators, r_weights,
                                     self._rnd_state)
 
+            transactional = isinstance(current, TransactionalState)
+
+            if transactional:
+                current_objective = current.objective()
+                current.begin()
+
             d_name, d_operator = self.destroy_operators[d_idx]
             destroyed = d_operator(current, self._rnd_state)
 
             r_name, r_operator = self.repair_operators[r_idx]
             candidate = r_operator(destroyed, self._rnd_state)
 
-            best, current, weight_idx = self._consider_candidate(best,
-                                                                 current,
-                                                                 candidate,
-                                                                 criterion)
+            if transactional and candidate is current:
+                best, current, weight_idx = self._consider_transaction(
+                    best, current, current_objective, criterion)
+            else:
+                if transactional:
+                    # The operators returned a new state, so whatever they
+                    # might have changed in place is undone.
+                    current.rollback()
+
+                best, current, weight_idx = self._consider_candidate(best,
+                                                                     current,
+                                                                     candidate,
+                                                                     criterion)
+
+                if isinstance(current, TransactionalState) and current is best:
+                    # The candidate is a new global best, and is about to be
+                    # modified in place by the operators.
+                    best = self._copy_best(best)
 
             # The weights are updated as convex combinations of the current
             # weight and the update parameter. See eq. (2), p. 12.
@@ -207,7 +268,7 @@ class ALNS:
                 statistics.collect_destroy_operator(d_name, weight_idx)
                 statistics.collect_repair_operator(r_name, weight_idx)
 
-        return Result(best, statistics if collect_stats else None)
+        return Result(best, statistics if collect_stats else None, lower_bound)
 
     def on_best(self, func):
         """
@@ -315,6 +376,73 @@ class ALNS:
         # have (if the candidate was accepted).
         return best, current, weight
 
+    def _consider_transaction(self, best, current, current_objective,
+                              criterion):
+        """
+        Considers the candidate solution that results from modifying the
+        current solution in place, within an open transaction. The transaction
+        is committed when the candidate is accepted, and rolled back when it is
+        rejected. See also `_consider_candidate`.
+
+        Parameters
+        ----------
+        best : State
+            Best solution encountered so far. This is a copy that is not
+            modified by the operators.
+        current : TransactionalState
+            Current solution, which holds the candidate solution.
+        current_objective : float
+            The objective value of the current solution before the transaction
+            was opened.
+        criterion : AcceptanceCriterion
+            The chosen acceptance criterion.
+
+        Returns
+        -------
+        State
+            The (possibly new) best state.
+        TransactionalState
+            The (possibly new) current state.
+        int
+            The weight index to use when updating the operator weights.
+        """
+        previous = _ObjectiveState(current_objective)
+        candidate = current
+
+        new_best, new_current, weight = self._consider_candidate(best,
+                                                                 previous,
+                                                                 candidate,
+                                                                 criterion)
+
+        if new_current is previous:
+            candidate.rollback()
+            return best, candidate, weight
+
+        candidate.commit()
+
+        if weight == _IS_BEST:
+            # The best solution is the only copy that is made. The on best
+            # callback might have returned a new state, which then becomes the
+            # current solution.
+            if not isinstance(new_best, TransactionalState):
+                return new_best, new_best, weight
+
+            return self._copy_best(new_best), new_best, weight
+
+        return best, new_current, weight
+
+    @staticmethod
+    def _copy_best(state):
+        """
+        Returns a copy of the passed-in new global best that is not affected by
+        later in-place modifications of the state. Encodable states are kept in
+        encoded form, and only decoded when the result is requested.
+        """
+        if isinstance(state, EncodableState):
+            return EncodedState.from_state(state)
+
+        return copy.deepcopy(state)
+
     def _validate_parameters(self, weights, operator_decay, iterations):
         """
         Helper method to validate the passed-in ALNS parameters.
@@ -350,3 +478,17 @@ class ALNS:
                           OverwriteWarning)
 
         self._callbacks[flag] = func
+
+
+class _ObjectiveState(State):
+    """
+    Stands in for a state of which only the objective value is known. Used to
+    present the current solution before an in-place modification to the
+    acceptance criterion.
+    """
+
+    def __init__(self, objective):
+        self._objective = objective
+
+    def objective(self):
+        return self._objective
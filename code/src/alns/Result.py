@@ -2,14 +2,42 @@ import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.pyplot import Axes, Figure  # pylint: disable=unused-import
 
-from .State import State  # pylint: disable=unused-import
+from .State import EncodedState, State  # pylint: disable=unused-import
 from .Statistics import Statistics  # pylint: disable=unused-import
 from .tools.exceptions import NotCollectedError
 
 
+def optimality_gap(objective, lower_bound):
+    """
+    Computes the optimality gap of an objective value with respect to a lower
+    bound, relative to the objective value.
+
+    Parameters
+    ----------
+    objective : float
+        The objective value.
+    lower_bound : float
+        A lower bound on the objective value.
+
+    Returns
+    -------
+    float
+        The gap, (objective - lower_bound) / |objective|. This is zero when the
+        objective value equals the lower bound, and infinite when the objective
+        value is zero but the lower bound is not.
+    """
+    if objective <= lower_bound:
+        return 0.
+
+    if objective == 0:
+        return np.inf
+
+    return (objective - lower_bound) / abs(objective)
+
+
 class Result:
 
-    def __init__(self, best, statistics=None):
+    def __init__(self, best, statistics=None, lower_bound=None):
         """
         Stores ALNS results. An instance of this class is returned once the
         algorithm completes.
@@ -17,12 +45,17 @@ class Result:
         Parameters
         ----------
         best : State
-            The best state observed during the entire iteration.
+            The best state observed during the entire iteration. This may be an
+            ``EncodedState``, which is decoded when first requested.
         statistics : Statistics
             Statistics optionally collected during iteration.
+        lower_bound : float
+            Optional lower bound on the objective value, used to compute the
+            optimality gap of the best state.
         """
         self._best = best
         self._statistics = statistics
+        self._lower_bound = lower_bound
 
     @property
     def best_state(self):
@@ -34,8 +67,57 @@ class Result:
         State
             The associated State object
         """
+        if isinstance(self._best, EncodedState):
+            self._best = self._best.materialize()
+
         return self._best
 
+    @property
+    def best_objective(self):
+        """
+        The objective value of the best state. Unlike ``best_state``, this does
+        not decode an encoded best state.
+
+        Returns
+        -------
+        float
+            The best objective value.
+        """
+        return self._best.objective()
+
+    @property
+    def lower_bound(self):
+        """
+        The lower bound on the objective value, if one was passed.
+
+        Returns
+        -------
+        float
+            The lower bound, or None.
+        """
+        return self._lower_bound
+
+    @property
+    def gap(self):
+        """
+        The optimality gap of the best state, see ``optimality_gap``.
+
+        Raises
+        ------
+        ValueError
+            When no lower bound was passed.
+
+        Returns
+        -------
+        float
+            The relative gap between the best objective and the lower bound.
+        """
+        if self._lower_bound is None:
+            raise ValueError("No lower bound was passed, so the gap is not"
+                             " known.")
+
+        return optimality_gap(self.best_objective, self._lower_bound)
+
     @property
     def statistics(self):
         """
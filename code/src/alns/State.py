@@ -22,3 +22,116 @@ class State(ABC):
             Some numeric value, e.g. an ``int`` or ``float``.
         """
         return NotImplemented
+
+
+class TransactionalState(State):
+    """
+    State that operators may modify in place. Changes made after ``begin()``
+    are journaled, and are either kept by ``commit()`` or undone by
+    ``rollback()``. The ALNS algorithm uses this to avoid copying the current
+    solution in each iteration: a copy is only made when a new global best is
+    found.
+    """
+
+    @abstractmethod
+    def begin(self):
+        """
+        Starts journaling the changes made to this state.
+        """
+        return NotImplemented
+
+    @abstractmethod
+    def commit(self):
+        """
+        Keeps the changes made since ``begin()``, and stops journaling.
+        """
+        return NotImplemented
+
+    @abstractmethod
+    def rollback(self):
+        """
+        Undoes the changes made since ``begin()``, and stops journaling.
+        """
+        return NotImplemented
+
+
+class EncodableState(State):
+    """
+    State that has a compact, hashable encoding. The ALNS algorithm uses this
+    to keep the best solution in encoded form, rather than as a copy of the
+    state, and only decodes it when the best state is requested.
+    """
+
+    @abstractmethod
+    def encode(self):
+        """
+        Encodes the solution of this state.
+
+        Returns
+        -------
+        Hashable
+            An encoding from which ``decode()`` can reconstruct the solution.
+        """
+        return NotImplemented
+
+    @abstractmethod
+    def decode(self, encoding):
+        """
+        Reconstructs a solution from its encoding. This may use the static
+        (problem) data of this state, but not its solution, which may have
+        changed since the encoding was made.
+
+        Parameters
+        ----------
+        encoding : Hashable
+            An encoding returned by ``encode()``.
+
+        Returns
+        -------
+        State
+            A new state holding the encoded solution.
+        """
+        return NotImplemented
+
+
+class EncodedState(State):
+    """
+    Stands in for a state that is kept in encoded form. Its objective value is
+    known without decoding, and ``materialize()`` decodes it into a state.
+    """
+
+    def __init__(self, encoding, objective, decoder):
+        """
+        Parameters
+        ----------
+        encoding : Hashable
+            The encoding, as returned by ``decoder.encode()``.
+        objective : float
+            The objective value of the encoded state.
+        decoder : EncodableState
+            A state of the same problem, used to decode the encoding.
+        """
+        self.encoding = encoding
+        self._objective = objective
+        self._decoder = decoder
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Encodes the passed-in state.
+        """
+        return cls(state.encode(), state.objective(), state)
+
+    def objective(self):
+        return self._objective
+
+    def materialize(self):
+        """
+        Decodes the encoding into a new state.
+
+        Returns
+        -------
+        State
+            The decoded state.
+        """
+        return self._decoder.decode(self.encoding)
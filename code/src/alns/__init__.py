@@ -1,2 +1,2 @@
 from .ALNS import ALNS
-from .State import State
+from .State import EncodableState, EncodedState, State, TransactionalState
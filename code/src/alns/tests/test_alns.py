@@ -2,8 +2,9 @@ import numpy.random as rnd
 from numpy.testing import (assert_, assert_almost_equal, assert_equal,
                            assert_no_warnings, assert_raises, assert_warns)
 
-from alns import ALNS, State
-from alns.criteria import HillClimbing, SimulatedAnnealing
+from alns import ALNS, EncodableState, EncodedState, State, TransactionalState
+from alns.criteria import (HillClimbing, RecordToRecordTravel,
+                            SimulatedAnnealing)
 from alns.tools.warnings import OverwriteWarning
 from .states import One, Zero
 
@@ -40,6 +41,55 @@ class ValueState(State):
         return self._value
 
 
+class CounterState(TransactionalState):
+    """
+    Helper state for testing in-place modifications. The objective value is
+    the counter, and the number of rollbacks is tracked.
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self.rollbacks = 0
+        self._journal = None
+
+    def objective(self):
+        return self.value
+
+    def add(self, amount):
+        if self._journal is not None:
+            self._journal.append(amount)
+
+        self.value += amount
+        return self
+
+    def begin(self):
+        self._journal = []
+
+    def commit(self):
+        self._journal = None
+
+    def rollback(self):
+        self.value -= sum(self._journal)
+        self.rollbacks += 1
+        self._journal = None
+
+
+class EncodableCounterState(CounterState, EncodableState):
+    """
+    Counter state that can be encoded, as its value. The number of decodes is
+    tracked.
+    """
+
+    decodes = 0
+
+    def encode(self):
+        return self.value
+
+    def decode(self, encoding):
+        EncodableCounterState.decodes += 1
+        return EncodableCounterState(encoding)
+
+
 # CALLBACKS --------------------------------------------------------------------
 
 def dummy_callback():
@@ -233,6 +283,30 @@ def test_raises_negative_weights():
         alns.iterate(One(), [1, 1, -5, 1], .5, HillClimbing())
 
 
+def test_raises_gap_tolerance_without_lower_bound():
+    """
+    The gap is only known with a lower bound, so a gap tolerance requires one.
+    """
+    alns = get_alns_instance([lambda state, rnd: None],
+                             [lambda state, rnd: None])
+
+    with assert_raises(ValueError):
+        alns.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(),
+                     gap_tolerance=0)
+
+
+def test_raises_negative_gap_tolerance():
+    """
+    The gap tolerance should be non-negative.
+    """
+    alns = get_alns_instance([lambda state, rnd: None],
+                             [lambda state, rnd: None])
+
+    with assert_raises(ValueError):
+        alns.iterate(One(), [1, 1, 1, 1], .5, HillClimbing(), lower_bound=0,
+                     gap_tolerance=-1)
+
+
 def test_raises_negative_iterations():
     """
     The number of iterations should be non-negative, as zero is allowed.
@@ -301,4 +375,183 @@ def test_fixed_seed_outcomes():
 
         assert_almost_equal(result.best_state.objective(), desired, decimal=5)
 
+
+
+# TRANSACTIONS -----------------------------------------------------------------
+
+
+def test_transactional_initial_solution_is_not_modified():
+    """
+    The operators modify a copy of a transactional initial solution in place,
+    so the passed-in initial solution itself should not change.
+    """
+    alns = get_alns_instance([lambda state, rnd: state.add(-1)],
+                             [lambda state, rnd: state])
+
+    initial_solution = CounterState(10)
+    result = alns.iterate(initial_solution, [1, 1, 1, 1], .5, HillClimbing(),
+                          5)
+
+    assert_equal(initial_solution.objective(), 10)
+    assert_equal(result.best_state.objective(), 5)
+    assert_(result.best_state is not initial_solution)
+
+
+def test_transactional_rejected_candidate_is_rolled_back():
+    """
+    Hill climbing rejects each worse candidate, which should undo the in-place
+    modification and leave the current solution as it was.
+    """
+    alns = get_alns_instance([lambda state, rnd: state.add(1)],
+                             [lambda state, rnd: state.add(1)])
+
+    result = alns.iterate(CounterState(0), [1, 1, 1, 1], .5, HillClimbing(),
+                          10)
+
+    assert_equal(result.best_state.objective(), 0)
+    assert_equal(result.statistics.objectives, [0] * 11)
+
+
+def test_transactional_best_is_not_modified_afterwards():
+    """
+    The best solution is a copy of the working solution, and should not change
+    when later (accepted) candidates modify the working solution.
+    """
+    amounts = iter([-1, -1, 1, 1])
+    alns = get_alns_instance([lambda state, rnd: state.add(next(amounts))],
+                             [lambda state, rnd: state])
+
+    # Always accepts, as the threshold is larger than any difference.
+    criterion = RecordToRecordTravel(10, 10, 0)
+    result = alns.iterate(CounterState(0), [1, 1, 1, 1], .5, criterion, 4)
+
+    assert_equal(result.best_state.objective(), -2)
+    assert_equal(result.statistics.objectives, [0, -1, -2, -1, 0])
+
+
+def test_transactional_new_state_from_operator():
+    """
+    Operators may still return a new state. Any in-place changes to the
+    current solution should then be rolled back.
+    """
+    def destroy(state, rnd):
+        state.add(5)
+        return CounterState(state.value - 6)
+
+    alns = get_alns_instance([lambda state, rnd: state], [destroy])
+
+    initial_solution = CounterState(0)
+    result = alns.iterate(initial_solution, [1, 1, 1, 1], .5, HillClimbing(),
+                          3)
+
+    assert_equal(result.best_state.objective(), -3)
+    assert_equal(result.statistics.objectives, [0, -1, -2, -3])
+
+
+def test_encodable_best_is_kept_encoded():
+    """
+    A new global best of an encodable working solution should be kept in
+    encoded form, and only be decoded when the best state is requested.
+    """
+    amounts = iter([-1, -1, 1, 1])
+    alns = get_alns_instance([lambda state, rnd: state.add(next(amounts))],
+                             [lambda state, rnd: state])
+
+    EncodableCounterState.decodes = 0
+    criterion = RecordToRecordTravel(10, 10, 0)
+    result = alns.iterate(EncodableCounterState(0), [1, 1, 1, 1], .5,
+                          criterion, 4)
+
+    assert_equal(EncodableCounterState.decodes, 0)
+    assert_equal(result.best_objective, -2)
+    assert_equal(EncodableCounterState.decodes, 0)
+
+    best = result.best_state
+
+    assert_(isinstance(best, EncodableCounterState))
+    assert_equal(best.objective(), -2)
+    assert_equal(EncodableCounterState.decodes, 1)
+
+    # The decoded state is cached, so it is not decoded again.
+    assert_(result.best_state is best)
+    assert_equal(EncodableCounterState.decodes, 1)
+
+
+def test_encodable_initial_best_is_not_encoded():
+    """
+    Without a new global best, the best state is the initial solution itself.
+    """
+    alns = get_alns_instance([lambda state, rnd: state.add(1)],
+                             [lambda state, rnd: state])
+
+    initial_solution = EncodableCounterState(0)
+    result = alns.iterate(initial_solution, [1, 1, 1, 1], .5, HillClimbing(),
+                          5)
+
+    assert_(result.best_state is initial_solution)
+
+
+def test_encoded_state_materialize():
+    """
+    An encoded state knows its objective, and decodes into a new state.
+    """
+    state = EncodableCounterState(3)
+    encoded = EncodedState.from_state(state)
+    state.add(2)
+
+    assert_equal(encoded.objective(), 3)
+    assert_equal(encoded.materialize().objective(), 3)
+    assert_(encoded.materialize() is not state)
+
+
+# LOWER BOUNDS -----------------------------------------------------------------
+
+
+def test_gap_tolerance_stops_early():
+    """
+    The iteration should stop as soon as the best solution reaches the lower
+    bound, when the gap tolerance is zero.
+    """
+    alns = get_alns_instance([lambda state, rnd: state.add(-1)],
+                             [lambda state, rnd: state])
+
+    result = alns.iterate(CounterState(0), [1, 1, 1, 1], .5, HillClimbing(),
+                          10, lower_bound=-3, gap_tolerance=0)
+
+    assert_equal(result.best_state.objective(), -3)
+    assert_equal(result.statistics.objectives, [0, -1, -2, -3])
+    assert_equal(result.gap, 0)
+
+
+def test_gap_tolerance_stops_within_tolerance():
+    """
+    The iteration should stop once the gap is within the tolerance, before
+    reaching the lower bound.
+    """
+    alns = get_alns_instance([lambda state, rnd: state.add(-1)],
+                             [lambda state, rnd: state])
+
+    result = alns.iterate(CounterState(20), [1, 1, 1, 1], .5, HillClimbing(),
+                          20, lower_bound=9, gap_tolerance=.1)
+
+    # The gap of 10 is (10 - 9) / 10 = .1, which is the first within tolerance.
+    assert_equal(result.best_state.objective(), 10)
+    assert_almost_equal(result.gap, .1)
+
+
+def test_lower_bound_without_gap_tolerance():
+    """
+    Without a gap tolerance, all iterations should be run, and the gap should
+    be reported.
+    """
+    alns = get_alns_instance([lambda state, rnd: state.add(-1)],
+                             [lambda state, rnd: state])
+
+    result = alns.iterate(CounterState(0), [1, 1, 1, 1], .5, HillClimbing(),
+                          5, lower_bound=-10)
+
+    assert_equal(len(result.statistics.objectives), 6)
+    assert_equal(result.lower_bound, -10)
+    assert_almost_equal(result.gap, 1)
+
 # TODO test more complicated examples?
@@ -1,12 +1,13 @@
 import numpy as np
 import numpy.random as rnd
 import pytest
-from numpy.testing import assert_, assert_raises
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
 
-from alns.Result import Result
+from alns.Result import Result, optimality_gap
 from alns.Statistics import Statistics
 from alns.tools.exceptions import NotCollectedError
-from .states import Sentinel
+from .states import One, Sentinel
 
 try:
     from matplotlib.testing.decorators import check_figures_equal
@@ -139,6 +140,28 @@ def test_raises_missing_statistics():
     result.statistics  # pylint: disable=pointless-statement
 
 
+def test_optimality_gap():
+    """
+    Tests the optimality gap, which is relative to the objective value.
+    """
+    assert_almost_equal(optimality_gap(10, 8), .2)
+    assert_almost_equal(optimality_gap(-10, -12), .2)
+    assert_equal(optimality_gap(5, 5), 0)
+    assert_equal(optimality_gap(0, -1), np.inf)
+
+
+def test_result_gap():
+    """
+    The gap is computed from the best state and the passed-in lower bound.
+    Without a lower bound, it is not known.
+    """
+    assert_equal(Result(One(), lower_bound=0).gap, 1)
+    assert_equal(Result(One(), lower_bound=1).gap, 0)
+
+    with assert_raises(ValueError):
+        Result(One()).gap  # pylint: disable=pointless-statement
+
+
 @pytest.mark.matplotlib
 @check_figures_equal(extensions=['png'])
 def test_plot_objectives(fig_test, fig_ref):
@@ -8,12 +8,14 @@ from gymnasium.envs.registration import register
 from stable_baselines3.common.callbacks import CheckpointCallback
 from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecMonitor
 
+from src.instance_cache import SharedInstancePool
 from . import settings as settings
 
 
-def create_env(env, config, n_workers, env_id, **kwargs):
+def create_env(env, config, n_workers, env_id, instance_pool=None, **kwargs):
     """
     Dynamically register and create the environment, ensuring each subprocess registers the environment.
+    The instance pool, if any, is passed to each environment, which attaches to its shared memory.
     """
 
     def make_env():
@@ -24,7 +26,7 @@ def create_env(env, config, n_workers, env_id, **kwargs):
                     register(
                         id=env_id,
                         entry_point=lambda: env(
-                            config, **kwargs
+                            config, instance_pool=instance_pool, **kwargs
                         ),  # Create environment with passed config
                     )
                 except Exception as e:
@@ -74,6 +76,7 @@ class Trainer:
         self.env_id = config["environment"]["env_id"]
         self.model = None
         self.env = env
+        self.instance_pool = None
 
         self.date = datetime.datetime.now().strftime("%m-%d_%H-%M")
 
@@ -91,12 +94,17 @@ class Trainer:
         self._create_model_dir()
         self.n_steps = self.config["main"]["n_steps"]
 
+        # Load the training instances once into shared memory, for all workers
+        if self.config["main"].get("shared_instances", True) and hasattr(self.env, "instance_paths"):
+            self.instance_pool = SharedInstancePool(self.env.instance_paths(self.config))
+
         # Create environment
         self.training_env = create_env(
             self.env,
             self.config,
             n_workers=self.config["main"]["n_workers"],
             env_id=self.env_id,
+            instance_pool=self.instance_pool,
         )
 
         policy_name = self.config["main"]["policy"]
@@ -207,6 +215,17 @@ class Trainer:
             self._save()
             print("Final model saved.")
 
+    def close(self):
+        """
+        Stop the environment workers and free the shared instance pool.
+        """
+        if getattr(self, "training_env", None) is not None:
+            self.training_env.close()
+            self.training_env = None
+        if self.instance_pool is not None:
+            self.instance_pool.close()
+            self.instance_pool = None
+
     # def launch_tensorboard(self):
     #     """
     #     Launch TensorBoard for the model's log directory.
@@ -0,0 +1,112 @@
+import gzip
+import lzma
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# the compressions, by their file extension, and the magic bytes their files start with
+COMPRESSIONS = {
+    ".gz": b"\x1f\x8b",
+    ".xz": b"\xfd7zXZ\x00",
+    ".zst": b"\x28\xb5\x2f\xfd",
+}
+_MAGIC_LENGTH = max(len(magic) for magic in COMPRESSIONS.values())
+
+
+def compression_of(path, magic=None):
+    """Return the compression of a file, as its extension in COMPRESSIONS, or None if it is not compressed
+    Args:
+        path::str
+            the path of the file
+        magic::bytes
+            the first bytes of the file if it exists, which take precedence over the extension
+    """
+    if magic is not None:
+        for extension, compression_magic in COMPRESSIONS.items():
+            if magic.startswith(compression_magic):
+                return extension
+        return None
+    extension = os.path.splitext(path)[1]
+    return extension if extension in COMPRESSIONS else None
+
+
+def open_file(path, mode="rb", compression=None):
+    """Open a file that may be compressed, with streaming (de)compression.
+    When reading, the compression is detected from the magic bytes of the file, so a compressed
+    file is read correctly whatever its extension. When writing or appending, it is given by the
+    extension of the path, unless a compression is passed
+    Args:
+        path::str
+            the path of the file
+        mode::str
+            'rb', 'wb', 'ab', 'rt', 'wt' or 'at', text modes use utf-8.
+            Appending to a compressed file adds a new compressed stream to it
+        compression::str
+            the extension of the compression to write with, see COMPRESSIONS, eg. '.gz'
+    Returns:
+        file::file object
+    """
+    if mode not in ("rb", "wb", "ab", "rt", "wt", "at"):
+        raise ValueError(f"Mode should be one of rb, wb, ab, rt, wt or at, found {mode}.")
+
+    if mode[0] == "r":
+        with open(path, "rb") as f:
+            compression = compression_of(path, f.read(_MAGIC_LENGTH))
+    elif compression is None:
+        compression = compression_of(path)
+    elif compression not in COMPRESSIONS:
+        raise ValueError(f"Compression should be one of {list(COMPRESSIONS)}, found {compression}.")
+
+    encoding = "utf-8" if mode[1] == "t" else None
+    if compression is None:
+        return open(path, mode, encoding=encoding)
+    if compression == ".gz":
+        return gzip.open(path, mode, encoding=encoding)
+    if compression == ".xz":
+        return lzma.open(path, mode, encoding=encoding)
+    if zstandard is None:
+        raise ImportError(f"Reading or writing {path} requires the zstandard package.")
+    return zstandard.open(path, mode, encoding=encoding)
+
+
+def decompress(content):
+    """Decompress the content of a file read as is, detecting the compression from its magic bytes,
+    see COMPRESSIONS. Content that is not compressed is returned unchanged"""
+    compression = compression_of(None, content[:_MAGIC_LENGTH])
+    if compression is None:
+        return content
+    if compression == ".gz":
+        return gzip.decompress(content)
+    if compression == ".xz":
+        return lzma.decompress(content)
+    if zstandard is None:
+        raise ImportError("Decompressing zstd content requires the zstandard package.")
+    with zstandard.ZstdDecompressor().stream_reader(content) as reader:
+        return reader.read()
+
+
+def read_bytes(path):
+    """Read the content of a file that may be compressed, see open_file"""
+    with open_file(path, "rb") as f:
+        return f.read()
+
+
+def resolve_compressed(path):
+    """Return the path of a file, or of its compressed version if only that one exists,
+    eg. instance.json.gz for instance.json, so that callers do not depend on the compression
+    of the files"""
+    if os.path.exists(path):
+        return path
+    for extension in COMPRESSIONS:
+        if os.path.exists(path + extension):
+            return path + extension
+    return path
+
+
+def strip_compression(path):
+    """Return a path without its compression extension, if any, eg. instance.json for instance.json.gz"""
+    extension = compression_of(path)
+    return path[: -len(extension)] if extension is not None else path
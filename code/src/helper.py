@@ -1,5 +1,8 @@
+from src.file_io import open_file
+
+
 ### output solution ###
-def save_output(YourName, psp, suffix):
+def save_output(YourName, psp, suffix, compression=None):
     """save the solution
     Args:
         YourName::str
@@ -10,12 +13,14 @@ def save_output(YourName, psp, suffix):
             suffix of the output file,
             'initial' for random initialization
             and 'solution' for the final solution
+        compression::str
+            compression of the output file, eg. '.gz', see src.file_io, None for plain text
     """
-    generate_output(YourName, psp, suffix)
+    generate_output(YourName, psp, suffix, compression)
 
 
 ### generate output file for the solution ###
-def generate_output(YourName, psp, suffix):
+def generate_output(YourName, psp, suffix, compression=None):
     """Generate output file (.txt) for the psp solution, containing the instance name, the objective value, and the route
     Args:
         YourName::str
@@ -26,12 +31,25 @@ def generate_output(YourName, psp, suffix):
             suffix of the output file,
             eg. 'initial' for random initialization
             and 'solution' for the final solution
+        compression::str
+            compression of the output file, which gets its extension, eg. '.gz', None for plain text
     """
-    workers = sorted(psp.workers, key=lambda x: x.id)
+    # group the assigned task ids by worker and day, using the task -> worker assignment
+    worker_day_tasks = {}
+    for task in psp.tasks:
+        w = psp.assignment[task.id]
+        if w >= 0:
+            worker_day_tasks.setdefault(w, {}).setdefault(task.day, []).append(task.id)
+
     str_builder = [
-        f"Objective: {psp.objective()}, Unassigned: {[t.id for t in psp.unassigned]}"
+        f"Objective: {psp.objective()}, Unassigned: {[t.id for t in psp.unassigned] + [t.id for t in psp.unassignable]}"
     ]
-    str_builder += [str(w) for w in workers]
-    str_builder = [e for e in str_builder if len(e) > 0]
-    with open("{}_{}_{}.txt".format(YourName, psp.name, suffix), "w") as f:
+    for w in sorted(worker_day_tasks, key=lambda w: psp.workers[w].id):
+        worker = psp.workers[w]
+        str_builder += [
+            f"Worker {worker.id}: Day {d} Hours {worker.blocks[d]} Tasks {sorted(task_ids)}"
+            for d, task_ids in sorted(worker_day_tasks[w].items())
+        ]
+    path = "{}_{}_{}.txt{}".format(YourName, psp.name, suffix, compression or "")
+    with open_file(path, "wt", compression) as f:
         f.write("\n".join(str_builder))
@@ -0,0 +1,584 @@
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from src.file_io import decompress, read_bytes, resolve_compressed, strip_compression
+from src.settings import INSTANCE_CACHE
+
+# bumped whenever the layout of the compiled arrays changes, which invalidates older caches
+FORMAT_VERSION = 3
+# compiled files start with the length of their json header, as 8 bytes little endian
+_HEADER_LENGTH_BYTES = 8
+
+
+### compiled instances ###
+# the keys of an instance json file
+INSTANCE_KEYS = ("name", "T", "ALPHA", "BMax", "WMax", "RMin", "Workers", "Tasks")
+
+
+def decode_json(content):
+    """Decode the content of a json file, with orjson when it is installed, as it is several
+    times faster than the json module on instance files
+    Args:
+        content::bytes
+            the content of the file
+    Returns:
+        data::dict
+            the decoded json
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def validate_instance(data):
+    """Check that the data of a PSP instance json file has the expected structure, so that an
+    invalid file fails with a clear message instead of deep in the solver.
+    The workers and tasks are checked while they are compiled, see compile_instance, which runs
+    once per file thanks to the cache, see load_compiled_instance
+    Args:
+        data::dict
+            the parsed json file
+    Raises:
+        ValueError: if a key is missing or a value has the wrong type
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Instance should be a json object, found {type(data).__name__}.")
+    missing = [key for key in INSTANCE_KEYS if key not in data]
+    if missing:
+        raise ValueError(f"Instance is missing the keys {missing}.")
+    for key in INSTANCE_KEYS[1:6]:
+        if not isinstance(data[key], int):
+            raise ValueError(f"Instance {key} should be an integer, found {data[key]!r}.")
+    for key in INSTANCE_KEYS[6:]:
+        if not isinstance(data[key], list):
+            raise ValueError(f"Instance {key} should be a list, found {type(data[key]).__name__}.")
+
+
+def _int_array(values, what):
+    """Convert a list of json values to an int64 array, checking that they are all integers"""
+    array = np.array(values)
+    if array.size > 0 and array.dtype.kind not in "iu":
+        raise ValueError(f"Instance {what} should be integers, found {array.dtype} values.")
+    return array.astype(np.int64, copy=False)
+
+
+def compile_instance(data):
+    """Compile the data of a PSP instance json file into flat arrays, after validating it,
+    see validate_instance, and presolve it, see presolve_instance
+    Args:
+        data::dict
+            the parsed json file
+    Returns:
+        arrays::{k: v}
+            name, the name of the instance,
+            skill_names, the list of skills in the order of their codes,
+            and numpy arrays: scalars (ALPHA, T, BMax, WMax, RMin),
+            worker_id, worker_rate, worker_bmax, worker_wmax, worker_rmin, worker_skills (workers x skills bool),
+            worker_available (workers x days x 2, the first and last available hour, -1 if not available),
+            task_id, task_skill (skill code), task_day, task_hour,
+            and the arrays of presolve_instance
+    Raises:
+        ValueError: if the data is not a valid instance
+    """
+    validate_instance(data)
+    try:
+        arrays = _compile_instance(data)
+    except (KeyError, TypeError, AttributeError) as error:
+        raise ValueError(f"Instance has an invalid worker or task: {error!r}.") from error
+    return presolve_instance(arrays)
+
+
+def _compile_instance(data):
+    """Compile validated instance data, see compile_instance.
+    The arrays are built from one list per column, which numpy converts much faster than
+    nested lists"""
+    workers, tasks = data["Workers"], data["Tasks"]
+    skill_names = sorted({skill for worker in workers for skill in worker["skills"]} | {task["skill"] for task in tasks})
+    skill_codes = {skill: code for code, skill in enumerate(skill_names)}
+    task_day = _int_array([task["day"] for task in tasks], "day")
+
+    # the available hours of all workers, as rows of (worker, day, first, last)
+    available = [
+        (w, int(day), first, last)
+        for w, worker in enumerate(workers)
+        for day, (first, last) in worker["available"].items()
+    ]
+    available = _int_array(available, "available hours").reshape(-1, 4)
+    num_days = max(data["T"], int(available[:, 1].max(initial=-1)) + 1, int(task_day.max(initial=-1)) + 1)
+    worker_available = np.full((len(workers), num_days, 2), -1, dtype=np.int64)
+    worker_available[available[:, 0], available[:, 1]] = available[:, 2:]
+
+    worker_skills = np.zeros((len(workers), len(skill_names)), dtype=bool)
+    for w, worker in enumerate(workers):
+        worker_skills[w, [skill_codes[skill] for skill in worker["skills"]]] = True
+
+    return {
+        "name": data["name"],
+        "skill_names": skill_names,
+        "scalars": np.array([data["ALPHA"], data["T"], data["BMax"], data["WMax"], data["RMin"]], dtype=np.int64),
+        "worker_id": _int_array([worker["w_id"] for worker in workers], "w_id"),
+        "worker_rate": _int_array([worker["rate"] for worker in workers], "rate"),
+        "worker_bmax": np.full(len(workers), data["BMax"], dtype=np.int64),
+        "worker_wmax": np.full(len(workers), data["WMax"], dtype=np.int64),
+        "worker_rmin": np.full(len(workers), data["RMin"], dtype=np.int64),
+        "worker_skills": worker_skills,
+        "worker_available": worker_available,
+        "task_id": _int_array([task["t_id"] for task in tasks], "t_id"),
+        "task_skill": np.array([skill_codes[task["skill"]] for task in tasks], dtype=np.int64),
+        "task_day": task_day,
+        "task_hour": _int_array([task["hour"] for task in tasks], "hour"),
+    }
+
+
+def presolve_instance(arrays):
+    """Derive the static data of the solver from the compiled arrays of an instance, see
+    psp.PSPInstance, and add it to them. It is computed when the instance is compiled and cached
+    with the rest, so that building an instance from the cache only converts arrays
+    Args:
+        arrays::{k: v}
+            the compiled arrays, see compile_instance
+    Returns:
+        arrays::{k: v}
+            the same dict, with the numpy arrays:
+            dims (number of days, number of hours in a day),
+            task_group, per task, the index of its group of tasks with the same skill, day and hour,
+            worker_class, per worker, the index of its class of workers with the same skills,
+            availability, rate and limits, both numbered in the order of their first member,
+            unassignable, the ids of the tasks without any worker with the skill and availability,
+            rate_order, the positions of the workers, cheapest rate first,
+            available_hours (workers x days), the mask of the available hours,
+            open_hours (workers x days), the mask of the hours at which the worker can take a task
+            in a solution without any tasks, i.e. the available hours unless wmax is 0,
+            slot_workers (days * hours x bytes), per day and hour, the mask of the workers open then,
+            skill_workers (skills x bytes), per skill, the mask of the workers that have it,
+            where the worker masks are little endian, with bit r for the worker rate_order[r]
+    Raises:
+        ValueError: if the hours do not fit in a 64-bit hour mask
+    """
+    worker_skills, available = arrays["worker_skills"], arrays["worker_available"]
+    task_id, task_skill, task_day, task_hour = (
+        arrays["task_id"], arrays["task_skill"], arrays["task_day"], arrays["task_hour"]
+    )
+    num_workers, num_days = available.shape[:2]
+    num_hours = max(int(task_hour.max(initial=-1)), int(available[:, :, 1].max(initial=-1))) + 1
+    if num_hours > 63:
+        raise ValueError(f"Hours up to {num_hours - 1} do not fit in a 64-bit hour mask.")
+
+    # the available hours as ranges, empty on the days the worker is not available
+    is_available = available[:, :, 0] >= 0
+    first = np.where(is_available, available[:, :, 0], 0)
+    last = np.where(is_available, available[:, :, 1], -1)
+    hours = np.arange(num_hours)
+    # (workers x days x hours) bool, whether the worker is available at the hour of the day
+    available_slots = (first[:, :, None] <= hours) & (hours <= last[:, :, None])
+
+    arrays["dims"] = np.array([num_days, num_hours], dtype=np.int64)
+    arrays["task_group"] = _group_in_order(np.stack([task_skill, task_day, task_hour], axis=1))
+    arrays["worker_class"] = _group_in_order(np.concatenate([
+        worker_skills, first, last,
+        np.stack([arrays["worker_rate"], arrays["worker_bmax"], arrays["worker_wmax"], arrays["worker_rmin"]], axis=1),
+    ], axis=1))
+
+    # eligibility only depends on the skill, day and hour of a task, so it is checked per day, hour
+    # and skill, as the number of available workers with the skill. Workers are never available
+    # before hour 0
+    slot_skills = available_slots.reshape(num_workers, num_days * num_hours).T.astype(np.float32) @ worker_skills.astype(np.float32)
+    valid = (task_day >= 0) & (task_hour >= 0)
+    has_worker = valid & (slot_skills[np.where(valid, task_day * num_hours + task_hour, 0), task_skill] > 0)
+    arrays["unassignable"] = task_id[~has_worker]
+
+    rate_order = np.argsort(arrays["worker_rate"], kind="stable")
+    arrays["rate_order"] = rate_order
+    available_hours = np.where(
+        first <= last, (np.uint64(1) << (last + 1).astype(np.uint64)) - (np.uint64(1) << first.astype(np.uint64)), 0,
+    ).astype(np.int64)
+    arrays["available_hours"] = available_hours
+    is_open = arrays["worker_wmax"] >= 1
+    arrays["open_hours"] = np.where(is_open[:, None], available_hours, 0)
+    open_slots = available_slots[rate_order] & is_open[rate_order, None, None]
+    arrays["slot_workers"] = _pack_masks(open_slots.reshape(num_workers, num_days * num_hours))
+    arrays["skill_workers"] = _pack_masks(worker_skills[rate_order])
+    return arrays
+
+
+def _group_in_order(keys):
+    """Group rows of keys as a dict would: return per row the index of its group, where the groups
+    are numbered in the order of their first row"""
+    # rows compare as raw bytes, which numpy sorts much faster than rows of values
+    keys = np.ascontiguousarray(keys, dtype=np.int64)
+    keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).reshape(-1)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse.reshape(-1)]
+
+
+def _pack_masks(bits):
+    """Pack the columns of a (workers x k) bool array into k little endian bitmasks, as the rows of
+    a (k x bytes) uint8 array"""
+    return np.packbits(np.ascontiguousarray(bits.T), axis=1, bitorder="little")
+
+
+def cache_path(json_file, cache_dir=INSTANCE_CACHE):
+    """Return the path of the compiled cache of a json file, keyed by its absolute path"""
+    json_file = os.path.abspath(json_file)
+    key = hashlib.sha1(json_file.encode("utf-8")).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(strip_compression(json_file)))[0]
+    return os.path.join(cache_dir, f"{stem}-{key}.psc")
+
+
+def pack_compiled_instance(arrays, source_hash=None, source_stat=None):
+    """Pack compiled arrays into the flat format of the cache files: the length of a json header
+    with the name, skills and the layout of the arrays, the header, then the raw bytes of each
+    array, 8-byte aligned
+    Args:
+        arrays::{k: v}
+            the compiled arrays, see compile_instance
+        source_hash::str
+            sha256 of the json file as stored on disk, compressed or not, to detect stale caches
+        source_stat::[int]
+            size and modification time in ns of the json file, checked before the hash
+    Returns:
+        packed::bytes
+            the packed instance, with a length that is a multiple of 8
+    """
+    header = {
+        "format_version": FORMAT_VERSION,
+        "source_hash": source_hash,
+        "source_stat": source_stat,
+        "name": arrays["name"],
+        "skill_names": arrays["skill_names"],
+        "arrays": {},
+    }
+    blobs, offset = [], 0
+    for name, value in arrays.items():
+        if not isinstance(value, np.ndarray):
+            continue
+        blob = np.ascontiguousarray(value).tobytes()
+        header["arrays"][name] = [offset, value.dtype.str, list(value.shape)]
+        blobs.append(blob + b"\0" * (-len(blob) % 8))
+        offset += len(blobs[-1])
+
+    header = json.dumps(header).encode("utf-8")
+    header += b" " * (-(len(header) + _HEADER_LENGTH_BYTES) % 8)
+    return b"".join([len(header).to_bytes(_HEADER_LENGTH_BYTES, "little"), header] + blobs)
+
+
+def unpack_compiled_instance(buffer, offset=0):
+    """Unpack an instance packed by pack_compiled_instance. The arrays are read-only views on
+    the buffer, so no parsing or copying is involved
+    Args:
+        buffer::bytes or memoryview
+            the buffer holding the packed instance
+        offset::int
+            the position of the packed instance in the buffer
+    Returns:
+        header::dict
+            the json header, see pack_compiled_instance
+        arrays::{k: v}
+            the compiled arrays, see compile_instance
+    """
+    header_length = int.from_bytes(buffer[offset:offset + _HEADER_LENGTH_BYTES], "little")
+    start = offset + _HEADER_LENGTH_BYTES + header_length
+    header = json.loads(bytes(buffer[offset + _HEADER_LENGTH_BYTES:start]))
+
+    arrays = {"name": header["name"], "skill_names": header["skill_names"]}
+    for name, (array_offset, dtype, shape) in header["arrays"].items():
+        # a view built in one call, several times faster than frombuffer and reshape on small arrays
+        array = np.ndarray(shape, dtype, buffer, start + array_offset)
+        array.flags.writeable = False
+        arrays[name] = array
+    return header, arrays
+
+
+def write_compiled_instance(path, arrays, source_hash, source_stat=None):
+    """Write compiled arrays to a cache file, see pack_compiled_instance"""
+    # write to a temporary file first, so that concurrent loads never see a partial cache
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as f:
+            f.write(pack_compiled_instance(arrays, source_hash, source_stat))
+        os.replace(temporary_path, path)
+    except OSError:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def read_compiled_instance(path):
+    """Read a cache file written by write_compiled_instance, see unpack_compiled_instance"""
+    with open(path, "rb") as f:
+        return unpack_compiled_instance(f.read())
+
+
+def load_compiled_instance(json_file, cache_dir=INSTANCE_CACHE):
+    """Load the compiled arrays of a PSP instance json file, see compile_instance.
+    The arrays are cached as a flat file in cache_dir, which is (re)built on the first load
+    and whenever the json file changed since, as detected by its size, modification time and hash.
+    Caching is best-effort: if cache_dir cannot be written, the arrays are returned all the same
+    Args:
+        json_file::str
+            the path to the json file
+        cache_dir::str
+            directory of the compiled files, None to compile without caching
+    Returns:
+        arrays::{k: v}
+            the compiled arrays, see compile_instance
+    """
+    json_file = resolve_compressed(json_file)
+    if cache_dir is None:
+        return compile_instance(decode_json(read_bytes(json_file)))
+
+    # a cache is fresh if the file is unchanged, as told by its size and modification time, or
+    # else by the hash of its bytes on disk, so a compressed file is only decompressed on a miss
+    stat = os.stat(json_file)
+    source_stat = [stat.st_size, stat.st_mtime_ns]
+    path = cache_path(json_file, cache_dir)
+    header, arrays = None, None
+    try:
+        header, arrays = read_compiled_instance(path)
+        if header["format_version"] != FORMAT_VERSION:
+            header = None
+        elif header["source_stat"] == source_stat:
+            return arrays
+    except (OSError, KeyError, ValueError):
+        # missing or unreadable cache, rebuilt below
+        header = None
+
+    with open(json_file, "rb") as f:
+        content = f.read()
+    source_hash = hashlib.sha256(content).hexdigest()
+    if header is None or header["source_hash"] != source_hash:
+        arrays = compile_instance(decode_json(decompress(content)))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # also rewritten when only the modification time changed, so that the next loads skip the hash
+        write_compiled_instance(path, arrays, source_hash, source_stat)
+    except OSError:
+        # the cache is best-effort, eg. on a read-only checkout the instance is compiled on every load
+        pass
+    return arrays
+
+
+class SharedInstancePool(object):
+    def __init__(self, json_files, cache_dir=INSTANCE_CACHE):
+        """Compiled instances, loaded once into a single shared memory block.
+        The pool can be passed to subprocesses, which attach to the block instead of loading
+        the instances again, and get the arrays as zero-copy views on it.
+        The process that creates the pool owns the block, and should close() it when done
+        Args:
+            json_files::[str]
+                paths of the instance json files
+            cache_dir::str
+                directory of the compiled files, see load_compiled_instance
+        """
+        packed = [pack_compiled_instance(load_compiled_instance(path, cache_dir)) for path in json_files]
+        self._index = {}
+        offset = 0
+        for path, blob in zip(json_files, packed):
+            self._index[os.path.abspath(path)] = offset
+            offset += len(blob)
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self._owner = True
+        for blob, offset in zip(packed, self._index.values()):
+            self._shm.buf[offset:offset + len(blob)] = blob
+
+    def compiled(self, path):
+        """Return the compiled arrays of an instance of the pool, see compile_instance"""
+        return unpack_compiled_instance(self._shm.buf, self._index[os.path.abspath(path)])[1]
+
+    def close(self):
+        """Detach from the shared memory, and free it if this process created the pool"""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getstate__(self):
+        # only the name of the block and the index are sent to subprocesses
+        return {"name": self._shm.name, "index": self._index}
+
+    def __setstate__(self, state):
+        self._index = state["index"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+
+
+### parsed instances ###
+class InstanceCache(object):
+    def __init__(self, loader, maxsize=64):
+        """An in-process cache of loaded instances, which evicts the least recently used
+        instance once it holds more than maxsize of them. Cached instances are shared,
+        so they should be immutable
+        Args:
+            loader::callable
+                loads the instance of a path, e.g. lambda path: Parser(path).instance
+            maxsize::int
+                the maximum number of cached instances, None for no bound
+        Attributes:
+            hits::int
+                number of get calls that found the instance in the cache
+            misses::int
+                number of get calls that loaded the instance
+        """
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"Cache size should be at least 1, found {maxsize}.")
+
+        self.loader = loader
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._instances = OrderedDict()
+
+    def get(self, path):
+        """Return the instance of the path, loading it on a miss"""
+        if path in self._instances:
+            self.hits += 1
+            self._instances.move_to_end(path)
+            return self._instances[path]
+
+        self.misses += 1
+        instance = self.loader(path)
+        self._instances[path] = instance
+        if self.maxsize is not None and len(self._instances) > self.maxsize:
+            self._instances.popitem(last=False)
+        return instance
+
+    def stats(self):
+        """Return the counters of the cache, for monitoring"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._instances)}
+
+    def clear(self):
+        self._instances.clear()
+
+    def __contains__(self, path):
+        return path in self._instances
+
+    def __len__(self):
+        return len(self._instances)
+
+
+class InstanceSource(object):
+    # marks the end of the instances in the queue
+    _END = object()
+
+    def __init__(self, paths, loader, prefetch=4, shuffle=False, cycle=False, seed=None):
+        """A stream of loaded instances. A background thread loads the next instances while the
+        current one is being solved, and holds at most prefetch loaded instances at a time, so
+        memory stays bounded however many paths there are
+        Args:
+            paths::[str]
+                paths of the instance files
+            loader::callable
+                loads the instance of a path, e.g. lambda path: Parser(path).instance
+            prefetch::int
+                the maximum number of instances loaded ahead
+            shuffle::bool
+                whether to go through the paths in random order, reshuffled on each pass
+            cycle::bool
+                whether to start over after the last path, for an endless stream
+            seed::int
+                random seed of the shuffles
+        """
+        if prefetch < 1:
+            raise ValueError(f"Prefetch should be at least 1, found {prefetch}.")
+
+        self.paths = list(paths)
+        self.loader = loader
+        self.shuffle = shuffle
+        self.cycle = cycle
+        self._random = random.Random(seed)
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._prefetch, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_directory(cls, directory, loader, pattern="*.json", **kwargs):
+        """Index the instance files of a directory once, see InstanceSource for the other arguments.
+        Compressed files match the pattern by their name without the compression extension"""
+        paths = [
+            path for path in glob.glob(os.path.join(directory, "*"))
+            if fnmatch.fnmatch(os.path.basename(strip_compression(path)), pattern)
+        ]
+        return cls(sorted(paths), loader, **kwargs)
+
+    def _prefetch(self):
+        # runs in the background thread, until the paths run out or the source is closed
+        try:
+            while not self._stop.is_set():
+                paths = self.paths.copy()
+                if self.shuffle:
+                    self._random.shuffle(paths)
+                for path in paths:
+                    if not self._put((path, self.loader(path))):
+                        return
+                if not self.cycle or not paths:
+                    break
+            self._put(self._END)
+        except Exception as exception:
+            # raised again in the consuming thread
+            self._put(exception)
+
+    def _put(self, item):
+        # wait for room in the queue, unless the source gets closed
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        """Return the next (path, instance), waiting for it to be loaded if needed"""
+        if self._stop.is_set():
+            raise StopIteration
+        item = self._queue.get()
+        if item is self._END:
+            self._stop.set()
+            raise StopIteration
+        if isinstance(item, Exception):
+            self._stop.set()
+            raise item
+        return item
+
+    def __len__(self):
+        return len(self.paths)
+
+    def close(self):
+        """Stop the background thread and drop the prefetched instances"""
+        self._stop.set()
+        self._thread.join()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,132 @@
+import json
+import os
+
+import numpy as np
+
+from src.file_io import open_file
+
+# the size tiers of generated instances, from the size of the shipped instances up to the largest
+# scale the solver should handle, as (workers, tasks, days)
+TIERS = {
+    "S": (44, 500, 5),
+    "M": (100, 2000, 7),
+    "L": (250, 6000, 14),
+    "XL": (500, 15000, 28),
+    "XXL": (1000, 30000, 28),
+    "XXXL": (2000, 50000, 56),
+}
+# the availability windows of a worker on a day, first and last hour, as in the shipped instances
+WINDOWS = ((0, 23), (0, 16), (8, 23))
+# the hourly rates of the workers, with their shares in the shipped instances
+RATES = ((15, 18), (17, 4), (20, 18), (25, 4))
+
+
+def skill_names(num_skills):
+    """Return the names of the skills of generated instances: A to Z, then S26, S27..."""
+    return [chr(ord("A") + k) if k < 26 else f"S{k}" for k in range(num_skills)]
+
+
+def generate_instance(
+    name, num_workers, num_tasks, num_days=5, num_skills=4, skill_rarity=1.0, availability=0.65,
+    seed=0, alpha=1000, bmax=12, wmax=None, rmin=12,
+):
+    """Generate the data of a PSP instance, with the structure of the json files read by Parser.
+    The instance only depends on the arguments, so the same seed always gives the same instance
+    Args:
+        name::str
+            name of the instance
+        num_workers, num_tasks, num_days::int
+            size of the instance
+        num_skills::int
+            number of distinct skills, workers have 1 to 4 of them
+        skill_rarity::float
+            how unevenly the skills are spread over the workers: skill k is held in proportion
+            to (k + 1) ** -skill_rarity, 0 for evenly. Tasks need each skill as often, so rarer
+            skills are harder to cover
+        availability::float
+            the probability that a worker is available on a day, between 0 and 1
+        seed::int
+            random seed
+        alpha::int
+            cost of each unassigned task
+        bmax, rmin::int
+            maximum block length and maximum rest time within a block, of all workers
+        wmax::int
+            maximum working hours of all workers, 9 per day if not given as in the shipped instances
+    Returns:
+        data::dict
+            the instance, see Parser
+    """
+    if not 0 <= availability <= 1:
+        raise ValueError(f"Availability should be between 0 and 1, found {availability}.")
+    if num_skills < 1:
+        raise ValueError(f"Number of skills should be at least 1, found {num_skills}.")
+
+    rng = np.random.default_rng(seed)
+    skills = skill_names(num_skills)
+    skill_weights = (np.arange(1, num_skills + 1, dtype=np.float64)) ** -skill_rarity
+    skill_weights /= skill_weights.sum()
+
+    rate_values, rate_shares = zip(*RATES)
+    rates = rng.choice(rate_values, size=num_workers, p=np.array(rate_shares) / sum(rate_shares))
+    skill_counts = rng.integers(1, min(4, num_skills) + 1, size=num_workers)
+    available_days = rng.random((num_workers, num_days)) < availability
+    windows = rng.integers(0, len(WINDOWS), size=(num_workers, num_days))
+
+    workers = []
+    for w in range(num_workers):
+        worker_skills = rng.choice(num_skills, size=skill_counts[w], replace=False, p=skill_weights)
+        workers.append({
+            "w_id": w,
+            "skills": [skills[k] for k in sorted(worker_skills.tolist())],
+            "available": {
+                str(day): list(WINDOWS[windows[w, day]]) for day in np.flatnonzero(available_days[w]).tolist()
+            },
+            "rate": int(rates[w]),
+        })
+
+    # tasks are ordered by skill, day and hour, as in the shipped instances
+    task_skills = rng.integers(0, num_skills, size=num_tasks)
+    task_days = rng.integers(0, num_days, size=num_tasks)
+    task_hours = rng.integers(0, 24, size=num_tasks)
+    order = np.lexsort((task_hours, task_days, task_skills))
+    tasks = [
+        {"t_id": t_id, "skill": skills[skill], "day": day, "hour": hour}
+        for t_id, (skill, day, hour) in enumerate(zip(
+            task_skills[order].tolist(), task_days[order].tolist(), task_hours[order].tolist()
+        ))
+    ]
+
+    return {
+        "name": name,
+        "T": num_days,
+        "ALPHA": alpha,
+        "BMin": 4,
+        "BMax": bmax,
+        "WMax": wmax if wmax is not None else 9 * num_days,
+        "RMin": rmin,
+        "Workers": workers,
+        "Tasks": tasks,
+    }
+
+
+def generate_tier(tier, seed=0, **kwargs):
+    """Generate an instance of a size tier, see TIERS, named after the tier and the seed.
+    The other arguments are those of generate_instance"""
+    if tier not in TIERS:
+        raise ValueError(f"Tier should be one of {list(TIERS)}, found {tier}.")
+    num_workers, num_tasks, num_days = TIERS[tier]
+    return generate_instance(f"{tier}_{seed}", num_workers, num_tasks, num_days, seed=seed, **kwargs)
+
+
+def write_instance(data, directory, compression=None):
+    """Write an instance to a json file named after it, which may be compressed, see src.file_io
+    Returns:
+        path::str
+            the path of the file
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, data["name"] + ".json" + (compression or ""))
+    with open_file(path, "wt", compression) as f:
+        json.dump(data, f, separators=(",", ":"))
+    return path
@@ -0,0 +1,185 @@
+import json
+import os
+
+from src.file_io import open_file
+from src.helper import save_output
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_record(record):
+    """Encode a record as a compact json line, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(record).decode("utf-8") + "\n"
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def solution_record(psp, seed, runtime, instance_file=None, **config):
+    """Return the record of a solution, as written by ResultsWriter
+    Args:
+        psp::PSP
+            the solution
+        seed::int
+            the random seed of the run
+        runtime::float
+            the duration of the run in seconds
+        instance_file::str
+            the path of the instance file, so that the solution can be rebuilt, see export_legacy.
+            It is stored as an absolute path
+        config::{k: v}
+            the settings of the run, eg. the number of iterations, json serializable
+    Returns:
+        record::dict
+            instance, instance_file, seed, objective, unassigned (the unassigned task ids),
+            assignment (per task id, the position of the worker the task is assigned to, -1 if
+            unassigned), runtime and config
+    """
+    return {
+        "instance": psp.name,
+        "instance_file": os.path.abspath(instance_file) if instance_file is not None else None,
+        "seed": seed,
+        "objective": psp.objective(),
+        "unassigned": [task.id for task in psp.unassigned] + [task.id for task in psp.unassignable],
+        "assignment": psp.assignment.tolist(),
+        "runtime": runtime,
+        "config": config,
+    }
+
+
+class ResultsWriter(object):
+    def __init__(self, path, flush_records=1000, flush_bytes=1 << 20):
+        """Append the records of many runs to a single json lines file, see solution_record.
+        Records are buffered in memory and written in one go when the buffer reaches
+        flush_records records or flush_bytes characters, and when the writer is closed.
+        The file may be compressed, see src.file_io
+        Args:
+            path::str
+                the path of the results file, records are appended to it if it exists
+            flush_records::int
+                the number of buffered records that triggers a write
+            flush_bytes::int
+                the size of the buffered records, in characters, that triggers a write
+        """
+        if flush_records < 1:
+            raise ValueError(f"Flush records should be at least 1, found {flush_records}.")
+
+        self.path = path
+        self.flush_records = flush_records
+        self.flush_bytes = flush_bytes
+        self.records = 0
+        self._buffer = []
+        self._buffer_size = 0
+        self._file = None
+
+    def write(self, record):
+        """Buffer a record, and write the buffer if it reached a threshold"""
+        line = encode_record(record)
+        self._buffer.append(line)
+        self._buffer_size += len(line)
+        self.records += 1
+        if len(self._buffer) >= self.flush_records or self._buffer_size >= self.flush_bytes:
+            self.flush()
+
+    def add(self, psp, seed, runtime, instance_file=None, **config):
+        """Buffer the record of a solution, see solution_record for the arguments"""
+        self.write(solution_record(psp, seed, runtime, instance_file, **config))
+
+    def flush(self):
+        """Write the buffered records to the file"""
+        if not self._buffer:
+            return
+        if self._file is None:
+            # opened on the first write, so that an unused writer leaves no file behind
+            self._file = open_file(self.path, "at")
+        self._file.write("".join(self._buffer))
+        self._file.flush()
+        self._buffer.clear()
+        self._buffer_size = 0
+
+    def close(self):
+        """Write the buffered records and close the file"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_results(path):
+    """Iterate over the records of a results file written by ResultsWriter"""
+    with open_file(path, "rt") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_solutions(path):
+    """Return the best record of each instance in a results file written by ResultsWriter, read
+    in a single pass, eg. to warm-start the runs of a directory of instances
+    Args:
+        path::str
+            the path of the results file
+    Returns:
+        records::{k: v}
+            key is the name of the instance, value is its record with the lowest objective,
+            see solution_record
+    """
+    best = {}
+    for record in read_results(path):
+        instance = record["instance"]
+        if instance not in best or record["objective"] < best[instance]["objective"]:
+            best[instance] = record
+    return best
+
+
+def read_solution(path, instance):
+    """Return the best record of an instance in a results file written by ResultsWriter, eg. to
+    warm-start a run from it with PSP.from_assignment, see read_solutions
+    Args:
+        path::str
+            the path of the results file
+        instance::str
+            the name of the instance
+    Returns:
+        record::dict
+            the record with the lowest objective, see solution_record
+    Raises:
+        ValueError: if the file has no record of the instance
+    """
+    best = read_solutions(path).get(instance)
+    if best is None:
+        raise ValueError(f"{path} has no solution of instance {instance}.")
+    return best
+
+
+def export_legacy(path, load_state, YourName, suffix="solution", compression=None):
+    """Write the solutions of a results file in the legacy text format, one file per record, see
+    helper.save_output. The seed of the record is appended to the suffix
+    Args:
+        path::str
+            the path of the results file
+        load_state::function
+            rebuilds the solution of a record, eg. with PSP.from_assignment
+        YourName::str
+            your name, eg. John_Doe
+        suffix::str
+            suffix of the output files, followed by the seed of each record
+        compression::str
+            compression of the output files, see helper.save_output
+    Returns:
+        count::int
+            the number of files written
+    """
+    count = 0
+    for record in read_results(path):
+        save_output(YourName, load_state(record), f"{suffix}{record['seed']}", compression)
+        count += 1
+    return count
@@ -9,5 +9,7 @@ INPUT = os.path.join(MAIN_DIR, "input")
 OUTPUT = os.path.join(MAIN_DIR, "output")
 RESULT = os.path.join(MAIN_DIR, "result")
 DATA_PATH = os.path.join(PARENT_DIR, "psp_instances")
+INSTANCE_CACHE = os.path.join(DATA_PATH, ".cache")
+GENERATED_INSTANCES = os.path.join(DATA_PATH, "generated")
 TRAINED_MODELS = os.path.join(MAIN_DIR, "trained_models")
 CONFIG = os.path.join(MAIN_DIR, "dr_configs")
@@ -0,0 +1,83 @@
+import gzip
+import lzma
+
+import pytest
+from numpy.testing import assert_equal, assert_raises
+
+from src.file_io import (COMPRESSIONS, compression_of, decompress, open_file,
+                         read_bytes, resolve_compressed, strip_compression)
+
+CONTENT = b'{"name": "S0", "Tasks": []}\n' * 10
+COMPRESS = {".gz": gzip.compress, ".xz": lzma.compress}
+
+
+# TESTS ------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("extension", [".gz", ".xz"])
+def test_write_by_extension(tmp_path, extension):
+    """
+    Tests if writing compresses as given by the extension of the path, so that
+    the file starts with the magic bytes of its compression.
+    """
+    path = str(tmp_path / ("instance.json" + extension))
+    with open_file(path, "wb") as f:
+        f.write(CONTENT)
+
+    with open(path, "rb") as f:
+        assert_equal(f.read(len(COMPRESSIONS[extension])), COMPRESSIONS[extension])
+    assert_equal(read_bytes(path), CONTENT)
+
+
+@pytest.mark.parametrize("extension", [".gz", ".xz"])
+def test_read_by_magic_bytes(tmp_path, extension):
+    """
+    Tests if reading detects the compression from the magic bytes, whatever the
+    extension of the path.
+    """
+    path = str(tmp_path / "instance.json")
+    with open(path, "wb") as f:
+        f.write(COMPRESS[extension](CONTENT))
+
+    assert_equal(read_bytes(path), CONTENT)
+    with open_file(path, "rt") as f:
+        assert_equal(f.read(), CONTENT.decode("utf-8"))
+
+
+def test_read_plain_file_with_compressed_extension(tmp_path):
+    path = str(tmp_path / "instance.json.gz")
+    with open(path, "wb") as f:
+        f.write(CONTENT)
+    assert_equal(read_bytes(path), CONTENT)
+
+
+@pytest.mark.parametrize("extension", [".gz", ".xz"])
+def test_decompress(extension):
+    assert_equal(decompress(COMPRESS[extension](CONTENT)), CONTENT)
+
+
+def test_decompress_plain_content():
+    assert_equal(decompress(CONTENT), CONTENT)
+
+
+def test_compression_of():
+    assert_equal(compression_of("a.json.gz"), ".gz")
+    assert_equal(compression_of("a.json"), None)
+    # the magic bytes take precedence over the extension
+    assert_equal(compression_of("a.json.gz", COMPRESSIONS[".xz"]), ".xz")
+    assert_equal(compression_of("a.json.gz", b"{}"), None)
+
+
+def test_resolve_compressed(tmp_path):
+    path = str(tmp_path / "instance.json")
+    assert_equal(resolve_compressed(path), path)
+
+    with open_file(path + ".xz", "wb") as f:
+        f.write(CONTENT)
+    assert_equal(resolve_compressed(path), path + ".xz")
+    assert_equal(strip_compression(path + ".xz"), path)
+
+
+def test_invalid_mode(tmp_path):
+    with assert_raises(ValueError):
+        open_file(str(tmp_path / "instance.json"), "r+")
@@ -0,0 +1,167 @@
+import json
+import os
+
+import pytest
+from numpy.testing import assert_, assert_equal, assert_raises
+
+from src import instance_cache
+from src.file_io import open_file
+from src.instance_cache import (InstanceCache, cache_path,
+                                load_compiled_instance,
+                                read_compiled_instance)
+from src.instance_generator import generate_instance, write_instance
+
+
+# HELPERS ----------------------------------------------------------------------
+
+
+@pytest.fixture
+def compile_counter(monkeypatch):
+    """
+    Test helper fixture: counts the instances compiled by load_compiled_instance.
+    """
+    calls = []
+    compile_instance = instance_cache.compile_instance
+
+    def counting_compile(data):
+        calls.append(data["name"])
+        return compile_instance(data)
+
+    monkeypatch.setattr(instance_cache, "compile_instance", counting_compile)
+    return calls
+
+
+def get_instance_file(directory, compression=None, alpha=1000):
+    """
+    Test helper method: write a small generated instance file.
+    """
+    data = generate_instance("cached", 6, 20, num_days=2, alpha=alpha)
+    return write_instance(data, str(directory), compression)
+
+
+def rewrite(path, alpha):
+    """
+    Test helper method: rewrite the instance file with another Alpha, of the same
+    size. The modification time is moved a second ahead, as file systems with a
+    coarse clock could otherwise keep it.
+    """
+    stat = os.stat(path)
+    with open_file(path, "rt") as f:
+        data = json.load(f)
+    data["ALPHA"] = alpha
+    with open_file(path, "wt") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+# TESTS ------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("compression", [None, ".gz", ".xz"])
+def test_cache_hit(tmp_path, compile_counter, compression):
+    """
+    Tests if an unchanged file is compiled once, then loaded from the cache.
+    """
+    path = get_instance_file(tmp_path / "instances", compression)
+    cache_dir = str(tmp_path / "cache")
+
+    first = load_compiled_instance(path, cache_dir)
+    second = load_compiled_instance(path, cache_dir)
+
+    assert_equal(len(compile_counter), 1)
+    assert_(os.path.exists(cache_path(path, cache_dir)))
+    for name, value in first.items():
+        assert_equal(second[name], value)
+
+
+def test_stale_after_modification(tmp_path, compile_counter):
+    """
+    Tests if a modified file of the same size is compiled again, as its
+    modification time and hash changed.
+    """
+    path = get_instance_file(tmp_path / "instances", alpha=1000)
+    cache_dir = str(tmp_path / "cache")
+    load_compiled_instance(path, cache_dir)
+
+    rewrite(path, 2000)
+    arrays = load_compiled_instance(path, cache_dir)
+    assert_equal(arrays["scalars"][0], 2000)
+    assert_equal(len(compile_counter), 2)
+
+    # the cache was rewritten, so the next load is a hit
+    arrays = load_compiled_instance(path, cache_dir)
+    assert_equal(arrays["scalars"][0], 2000)
+    assert_equal(len(compile_counter), 2)
+
+
+def test_stale_after_modification_time(tmp_path, compile_counter):
+    """
+    Tests if a file whose modification time changed is checked by its hash,
+    without being compiled again, and if the cache is updated with the new
+    modification time so that the next load skips the hash.
+    """
+    path = get_instance_file(tmp_path / "instances")
+    cache_dir = str(tmp_path / "cache")
+    load_compiled_instance(path, cache_dir)
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    load_compiled_instance(path, cache_dir)
+    assert_equal(len(compile_counter), 1)
+
+    header, _ = read_compiled_instance(cache_path(path, cache_dir))
+    assert_equal(header["source_stat"], [stat.st_size, stat.st_mtime_ns + 10 ** 9])
+
+
+def test_stale_format_version(tmp_path, compile_counter, monkeypatch):
+    """
+    Tests if a cache written with another format version is compiled again.
+    """
+    path = get_instance_file(tmp_path / "instances")
+    cache_dir = str(tmp_path / "cache")
+    load_compiled_instance(path, cache_dir)
+
+    monkeypatch.setattr(instance_cache, "FORMAT_VERSION", instance_cache.FORMAT_VERSION + 1)
+    load_compiled_instance(path, cache_dir)
+    assert_equal(len(compile_counter), 2)
+
+
+def test_instance_cache_lru():
+    """
+    Tests if the least recently used instance is evicted, and the counters.
+    """
+    loaded = []
+
+    def loader(path):
+        loaded.append(path)
+        return path.upper()
+
+    cache = InstanceCache(loader, maxsize=2)
+    assert_equal(cache.get("a"), "A")
+    assert_equal(cache.get("b"), "B")
+    assert_equal(cache.get("a"), "A")
+
+    # b is the least recently used
+    cache.get("c")
+    assert_("a" in cache and "c" in cache and "b" not in cache)
+    assert_equal(len(cache), 2)
+
+    cache.get("b")
+    assert_("a" not in cache)
+    assert_equal(loaded, ["a", "b", "c", "b"])
+    assert_equal(cache.stats(), {"hits": 1, "misses": 4, "size": 2})
+
+    cache.clear()
+    assert_equal(len(cache), 0)
+
+
+def test_instance_cache_unbounded():
+    cache = InstanceCache(lambda path: path, maxsize=None)
+    for path in range(100):
+        cache.get(path)
+    assert_equal(len(cache), 100)
+
+
+def test_instance_cache_size_at_least_one():
+    with assert_raises(ValueError):
+        InstanceCache(lambda path: path, maxsize=0)
@@ -0,0 +1,234 @@
+import numpy as np
+import numpy.random as rnd
+import pytest
+from numpy.testing import assert_, assert_equal
+
+from operators import (destroy_1, destroy_2, destroy_3, repair_1, repair_2,
+                       repair_3, repair_4)
+from psp import PSP, PSPInstance, Task, WorkerProfile
+from src.instance_cache import compile_instance
+from src.instance_generator import generate_instance
+
+DESTROY_OPERATORS = [destroy_1, destroy_2, destroy_3]
+REPAIR_OPERATORS = [repair_1, repair_2, repair_3, repair_4]
+
+
+# HELPERS ----------------------------------------------------------------------
+
+
+def get_instance(seed=0, **kwargs):
+    """
+    Test helper method: a small generated instance, built from its compiled arrays.
+    """
+    kwargs = {"num_workers": 12, "num_tasks": 80, "num_days": 3, **kwargs}
+    data = generate_instance(f"test_{seed}", seed=seed, **kwargs)
+    return PSPInstance.from_compiled(compile_instance(data))
+
+
+def get_crowded_instance(seed=0):
+    """
+    Test helper method: an instance with many tasks of several skills per day and
+    hour, and workers with overlapping skills, with rates on both sides of Alpha,
+    so that the matchings of the lower bound have to move workers between skills.
+    """
+    rng = np.random.default_rng(seed)
+    skills = ["A", "B", "C"]
+    workers = []
+    for w_id in range(10):
+        num_skills = rng.integers(1, len(skills) + 1)
+        worker_skills = rng.choice(skills, size=num_skills, replace=False).tolist()
+        available = {day: (8, 10) for day in range(2) if rng.random() < 0.8}
+        rate = int(rng.integers(10, 70))
+        workers.append(WorkerProfile(w_id, worker_skills, available, rate, 2, 6, 12, 2))
+
+    tasks = [
+        Task(t_id, str(rng.choice(skills)), int(rng.integers(0, 2)), int(rng.integers(8, 11)))
+        for t_id in range(40)
+    ]
+    return PSPInstance(f"crowded_{seed}", 60, workers, tasks)
+
+
+def operator_states(instance, seed, iterations=60):
+    """
+    Test helper method: iterate over the states of a random sequence of destroy and
+    repair operators, applied in transactions that are committed or rolled back at
+    random, as in ALNS.iterate.
+    """
+    random_state = rnd.RandomState(seed)
+    state = PSP(instance)
+    state.random_initialize(seed)
+    yield state
+
+    for _ in range(iterations):
+        destroy = DESTROY_OPERATORS[random_state.randint(len(DESTROY_OPERATORS))]
+        repair = REPAIR_OPERATORS[random_state.randint(len(REPAIR_OPERATORS))]
+
+        state.begin()
+        repair(destroy(state, random_state), random_state)
+        if random_state.random_sample() < 0.5:
+            state.commit()
+        else:
+            state.rollback()
+        yield state
+
+
+def solution_data(state):
+    """
+    Test helper method: the assignment data of a state, to compare states exactly.
+    The unassigned tasks are compared as a set, as rolling back may reorder them.
+    """
+    solution = state.solution
+    return {
+        "assignment": list(solution.assignment),
+        "block_start": list(solution.block_start),
+        "block_end": list(solution.block_end),
+        "occupancy": list(solution.occupancy),
+        "hours": list(solution.hours),
+        "block_hours": list(solution.block_hours),
+        "unassigned": set(solution.unassigned),
+        "f2": solution.f2,
+        "fingerprint": solution.fingerprint,
+        "open_hours": list(solution.open_hours),
+        "slot_workers": list(solution.slot_workers),
+        "next_order": solution.next_order,
+    }
+
+
+def slot_matching_bound(instance):
+    """
+    Test helper method: the lower bound of PSPInstance.lower_bound, computed
+    independently. Each slot (day, hour) is solved exactly by dynamic programming
+    over the workers, on the subsets of the tasks of the slot that are matched.
+    """
+    slots = {}
+    for task in instance.tasks:
+        slots.setdefault((task.day, task.hour), []).append(task)
+
+    bound = 0
+    for (day, hour), tasks in slots.items():
+        costs = {0: 0}
+        for profile in instance.workers:
+            first, last = profile.available.get(day, (0, -1))
+            if not first <= hour <= last:
+                continue
+
+            # the worker takes at most one task of the slot
+            updated = dict(costs)
+            for matched, cost in costs.items():
+                for t, task in enumerate(tasks):
+                    if task.skill in profile.skills and not matched >> t & 1:
+                        key = matched | 1 << t
+                        updated[key] = min(updated.get(key, np.inf), cost + profile.rate)
+            costs = updated
+
+        bound += min(
+            cost + instance.Alpha * (len(tasks) - bin(matched).count("1"))
+            for matched, cost in costs.items()
+        )
+    return bound
+
+
+# TESTS ------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_cached_objective_after_operators(seed):
+    """
+    Tests if the cached objective matches the objective recomputed from the
+    assignment alone, after every move of random operator sequences.
+    """
+    for state in operator_states(get_instance(seed), seed):
+        assert_equal(state.objective(), state.compute_objective())
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_feasibility_matches_can_assign(seed):
+    """
+    Tests if free_workers and feasibility_matrix agree with Worker.can_assign on
+    every pair of worker and unassigned task, along random operator sequences.
+    """
+    for state in operator_states(get_instance(seed), seed, iterations=20):
+        tasks = list(state.unassigned)
+        expected = np.array(
+            [[worker.can_assign(task) for task in tasks] for worker in state.workers],
+            dtype=bool,
+        ).reshape(len(state.workers), len(tasks))
+
+        assert_equal(state.feasibility_matrix(tasks), expected)
+
+        for j, task in enumerate(tasks):
+            free = [worker.index for worker in state.free_workers(task)]
+            assert_equal(sorted(free), np.flatnonzero(expected[:, j]).tolist())
+
+            # cheapest rate first
+            rates = [state.workers[w].rate for w in free]
+            assert_equal(rates, sorted(rates))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_rollback_restores_state(seed):
+    """
+    Tests if rolling back a transaction of destroy and repair operators restores
+    the assignment, fingerprint and slot index of the state exactly.
+    """
+    random_state = rnd.RandomState(seed)
+    state = PSP(get_instance(seed))
+    state.random_initialize(seed)
+
+    for _ in range(40):
+        before = solution_data(state)
+        destroy = DESTROY_OPERATORS[random_state.randint(len(DESTROY_OPERATORS))]
+        repair = REPAIR_OPERATORS[random_state.randint(len(REPAIR_OPERATORS))]
+
+        state.begin()
+        repair(destroy(state, random_state), random_state)
+        state.rollback()
+
+        after = solution_data(state)
+        for name, value in before.items():
+            assert_equal(after[name], value, err_msg=name)
+
+
+def test_rollback_restores_fresh_slot_index():
+    """
+    Tests if the slot index after a rollback is the one of a state built from
+    scratch with the same assignment.
+    """
+    random_state = rnd.RandomState(1)
+    instance = get_instance(1)
+    state = PSP(instance)
+    state.random_initialize(1)
+
+    for _ in range(20):
+        state.begin()
+        repair_4(destroy_1(state, random_state), random_state)
+        state.rollback()
+
+    rebuilt = PSP.from_assignment(instance, state.solution.assignment)
+    assert_equal(list(state.solution.slot_workers), list(rebuilt.solution.slot_workers))
+    assert_equal(list(state.solution.open_hours), list(rebuilt.solution.open_hours))
+    assert_equal(state.fingerprint, rebuilt.fingerprint)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_lower_bound_matches_independent_matching(seed):
+    """
+    Tests the lower bound against an independent exact matching per slot, on
+    instances where workers have to be moved between skills.
+    """
+    instance = get_crowded_instance(seed)
+    assert_equal(instance.lower_bound(), slot_matching_bound(instance))
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_lower_bound_below_solutions(seed):
+    """
+    Tests if the lower bound matches the independent matching on generated
+    instances, and is at most the objective of the solutions found.
+    """
+    instance = get_instance(seed, num_tasks=40)
+    bound = instance.lower_bound()
+    assert_equal(bound, slot_matching_bound(instance))
+
+    for state in operator_states(instance, seed, iterations=20):
+        assert_(bound <= state.objective())
@@ -0,0 +1,117 @@
+import os
+
+import pytest
+from numpy.testing import assert_, assert_equal, assert_raises
+
+from src.results import ResultsWriter, read_results, read_solution, read_solutions
+
+
+# HELPERS ----------------------------------------------------------------------
+
+
+def get_record(instance="S0", objective=100, seed=0):
+    """
+    Test helper method: a record with the fields of solution_record.
+    """
+    return {
+        "instance": instance,
+        "instance_file": None,
+        "seed": seed,
+        "objective": objective,
+        "unassigned": [],
+        "assignment": [0, 1, -1],
+        "runtime": 0.5,
+        "config": {"iterations": 10},
+    }
+
+
+# TESTS ------------------------------------------------------------------------
+
+
+def test_flush_records(tmp_path):
+    """
+    Tests if the buffer is written once it holds flush_records records, and not
+    before: the file is only created by the first write.
+    """
+    path = str(tmp_path / "results.jsonl")
+    writer = ResultsWriter(path, flush_records=3)
+
+    writer.write(get_record(seed=0))
+    writer.write(get_record(seed=1))
+    assert_(not os.path.exists(path))
+
+    writer.write(get_record(seed=2))
+    assert_equal([record["seed"] for record in read_results(path)], [0, 1, 2])
+
+    writer.write(get_record(seed=3))
+    assert_equal(len(list(read_results(path))), 3)
+
+    writer.close()
+    assert_equal([record["seed"] for record in read_results(path)], [0, 1, 2, 3])
+    assert_equal(writer.records, 4)
+
+
+def test_flush_bytes(tmp_path):
+    """
+    Tests if the buffer is written once its size reaches flush_bytes, whatever
+    the number of records.
+    """
+    path = str(tmp_path / "results.jsonl")
+    writer = ResultsWriter(path, flush_records=1000, flush_bytes=1)
+
+    writer.write(get_record())
+    assert_equal(len(list(read_results(path))), 1)
+    writer.close()
+
+
+def test_unused_writer_leaves_no_file(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    ResultsWriter(path).close()
+    assert_(not os.path.exists(path))
+
+
+def test_flush_records_at_least_one(tmp_path):
+    with assert_raises(ValueError):
+        ResultsWriter(str(tmp_path / "results.jsonl"), flush_records=0)
+
+
+@pytest.mark.parametrize("extension", ["", ".gz", ".xz"])
+def test_append_round_trip(tmp_path, extension):
+    """
+    Tests if records read back equal those written, and if a second writer
+    appends to the file of the first one, compressed or not.
+    """
+    path = str(tmp_path / ("results.jsonl" + extension))
+    first = [get_record(seed=seed) for seed in range(3)]
+    second = [get_record("S1", objective=50, seed=seed) for seed in range(2)]
+
+    with ResultsWriter(path, flush_records=2) as writer:
+        for record in first:
+            writer.write(record)
+    with ResultsWriter(path) as writer:
+        for record in second:
+            writer.write(record)
+
+    assert_equal(list(read_results(path)), first + second)
+
+
+def test_read_solutions(tmp_path):
+    """
+    Tests if the best record of each instance is found in one pass, and if
+    read_solution raises on an instance without records.
+    """
+    path = str(tmp_path / "results.jsonl")
+    with ResultsWriter(path) as writer:
+        writer.write(get_record("S0", objective=300, seed=0))
+        writer.write(get_record("S1", objective=200, seed=1))
+        writer.write(get_record("S0", objective=100, seed=2))
+        writer.write(get_record("S0", objective=200, seed=3))
+
+    best = read_solutions(path)
+    assert_equal(sorted(best), ["S0", "S1"])
+    assert_equal(best["S0"]["seed"], 2)
+    assert_equal(best["S1"]["seed"], 1)
+    assert_equal(read_solution(path, "S0")["seed"], 2)
+
+    with assert_raises(ValueError):
+        read_solution(path, "S2")